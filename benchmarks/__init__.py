@@ -0,0 +1,9 @@
+r"""Нагрузочные замеры Блогикума.
+
+    python -m benchmarks run --posts 100000 --comments 1000000 \\
+        --output results/HEAD.json
+    python -m benchmarks compare results/base.json results/HEAD.json
+
+Данные генерируются детерминированно из --seed, поэтому результаты
+разных коммитов на одной машине сравнимы между собой.
+"""
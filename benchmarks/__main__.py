@@ -0,0 +1,208 @@
+import argparse
+import json
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import urlencode
+
+from benchmarks.environment import ROOT, describe, django_env, setup_django
+from benchmarks.load import drive
+from benchmarks.seed import is_seeded, seed
+
+HOST = '127.0.0.1'
+
+
+def endpoints():
+    """Основные страницы блога с адресами на сгенерированных данных."""
+    from django.db.models import Count
+    from django.urls import reverse
+
+    from blog.models import Category, Post, User
+
+    post = Post.objects.filter(
+        is_published=True, category__is_published=True,
+        pub_date__lte=datetime.now(timezone.utc),
+    ).order_by('-comment_count').only('id', 'title').first()
+    category = Category.objects.filter(is_published=True).annotate(
+        total=Count('posts')
+    ).order_by('-total').first()
+    author = User.objects.annotate(
+        total=Count('posts')
+    ).order_by('-total').first()
+    query = post.title.split()[0]
+    return {
+        'index': reverse('blog:index'),
+        'index_page_50': reverse('blog:index') + '?page=50',
+        'index_cursor': reverse('blog:index') + '?cursor=',
+        'category_posts': reverse(
+            'blog:category_posts', args=(category.slug,)
+        ),
+        'profile': reverse('blog:profile', args=(author.username,)),
+        'post_detail': reverse('blog:post_detail', args=(post.id,)),
+        'post_comments': reverse('blog:post_comments', args=(post.id,)),
+        'search': reverse('blog:search') + '?' + urlencode({'q': query}),
+        'about': reverse('pages:about'),
+    }
+
+
+def login_client(anonymous):
+    from django.test import Client
+
+    from blog.models import User
+
+    client = Client()
+    if not anonymous:
+        client.force_login(User.objects.get(username='bench0'))
+    return client
+
+
+def count_queries(client, path):
+    """Число запросов к БД на странице с прогретым кэшем."""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    client.get(path)
+    with CaptureQueriesContext(connection) as context:
+        client.get(path)
+    return len(context.captured_queries)
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex((HOST, port)) == 0:
+                return
+        time.sleep(0.1)
+    raise RuntimeError(f'Сервер не запустился на порту {port}')
+
+
+def run(options):
+    database = options.database or Path(tempfile.mkdtemp()) / 'bench.sqlite3'
+    setup_django(database, options.async_views)
+    params = {
+        'posts': options.posts, 'comments': options.comments,
+        'users': options.users, 'seed': options.seed,
+    }
+    if options.reuse and is_seeded(database, params):
+        print(f'Используется готовая база {database}', file=sys.stderr)
+    else:
+        seed(database, log=lambda line: print(line, file=sys.stderr),
+             **params)
+    paths = endpoints()
+    client = login_client(options.anonymous)
+    queries = {
+        name: count_queries(client, path) for name, path in paths.items()
+    }
+    cookie = '; '.join(
+        f'{name}={morsel.value}' for name, morsel in client.cookies.items()
+    )
+    server = subprocess.Popen(
+        [
+            sys.executable, '-m', 'benchmarks.server',
+            '--port', str(options.port), '--server', options.server,
+        ],
+        cwd=ROOT,
+        env=django_env(database, options.async_views),
+    )
+    results = {}
+    try:
+        wait_for_port(options.port)
+        headers = {'Cookie': cookie} if cookie else {}
+        for name, path in paths.items():
+            drive(HOST, options.port, path, options.warmup, 1, headers)
+            results[name] = {
+                'path': path,
+                'queries': queries[name],
+                **drive(
+                    HOST, options.port, path, options.requests,
+                    options.concurrency, headers, server.pid,
+                ),
+            }
+            print(f'{name}: {results[name]}', file=sys.stderr)
+    finally:
+        server.terminate()
+        server.wait()
+    report = {
+        'started_at': datetime.now(timezone.utc).isoformat(),
+        'environment': describe(),
+        'params': {
+            **params,
+            'requests': options.requests,
+            'concurrency': options.concurrency,
+            'server': options.server,
+            'async_views': options.async_views,
+            'anonymous': options.anonymous,
+        },
+        'endpoints': results,
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if options.output:
+        Path(options.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(options.output).write_text(output)
+    else:
+        print(output)
+
+
+def change(old, new):
+    if not old or new is None:
+        return '—'
+    return f'{(new - old) / old:+.1%}'
+
+
+def compare(options):
+    """Сравнить два отчёта: пропускную способность и p95 по страницам."""
+    old, new = (json.loads(Path(path).read_text()) for path in options.reports)
+    if old['params'] != new['params']:
+        print('Внимание: параметры прогонов различаются', file=sys.stderr)
+    print(
+        f'{"страница":<16} {"зпр/с":>9} {"Δ":>8} {"p95, мс":>9} {"Δ":>8}'
+        f' {"запросы":>9}'
+    )
+    for name, result in new['endpoints'].items():
+        before = old['endpoints'].get(name, {})
+        print(
+            f'{name:<16} {result["rps"]:>9} '
+            f'{change(before.get("rps"), result["rps"]):>8} '
+            f'{result["p95_ms"]:>9} '
+            f'{change(before.get("p95_ms"), result["p95_ms"]):>8} '
+            f'{before.get("queries", "—")!s:>4}→{result["queries"]:<4}'
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks')
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help='Наполнить базу и замерить')
+    run_parser.add_argument('--database', type=Path)
+    run_parser.add_argument('--reuse', action='store_true',
+                            help='Не наполнять заново базу с теми же данными')
+    run_parser.add_argument('--posts', type=int, default=10000)
+    run_parser.add_argument('--comments', type=int, default=100000)
+    run_parser.add_argument('--users', type=int, default=100)
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('--requests', type=int, default=300,
+                            help='Запросов на каждую страницу')
+    run_parser.add_argument('--warmup', type=int, default=5)
+    run_parser.add_argument('--concurrency', type=int, default=8)
+    run_parser.add_argument('--port', type=int, default=8765)
+    run_parser.add_argument('--server', choices=('wsgi', 'uvicorn'),
+                            default='wsgi')
+    run_parser.add_argument('--async-views', action='store_true')
+    run_parser.add_argument('--anonymous', action='store_true',
+                            help='Без авторизации, через кэш страниц')
+    run_parser.add_argument('--output', type=Path)
+    run_parser.set_defaults(handler=run)
+    compare_parser = commands.add_parser('compare', help='Сравнить отчёты')
+    compare_parser.add_argument('reports', nargs=2)
+    compare_parser.set_defaults(handler=compare)
+    options = parser.parse_args()
+    options.handler(options)
+
+
+if __name__ == '__main__':
+    main()
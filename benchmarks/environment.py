@@ -0,0 +1,57 @@
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+PROJECT = ROOT / 'blogicum'
+SETTINGS = 'benchmarks.settings'
+
+
+def django_env(database, async_views=False):
+    """Переменные окружения для процессов с настройками замеров."""
+    return dict(
+        os.environ,
+        DJANGO_SETTINGS_MODULE=SETTINGS,
+        BLOGICUM_SQLITE_PATH=str(database),
+        BLOGICUM_ASYNC_VIEWS='1' if async_views else '0',
+        PYTHONPATH=os.pathsep.join((str(PROJECT), str(ROOT))),
+    )
+
+
+def setup_django(database, async_views=False):
+    os.environ.update(django_env(database, async_views))
+    for path in (str(PROJECT), str(ROOT)):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    import django
+
+    django.setup()
+
+
+def git(*args):
+    try:
+        return subprocess.run(
+            ('git', *args), cwd=ROOT, capture_output=True, text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def describe():
+    """Версия кода и окружения, по которым сравниваются прогоны."""
+    import django
+
+    status = git('status', '--porcelain', '--untracked-files=no')
+    return {
+        'commit': git('rev-parse', 'HEAD'),
+        'dirty': bool(status) if status is not None else None,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
@@ -0,0 +1,113 @@
+import http.client
+import math
+import threading
+import time
+from pathlib import Path
+
+
+def percentile(values, percent):
+    """Перцентиль по методу ближайшего ранга для отсортированного списка."""
+    if not values:
+        return None
+    rank = max(math.ceil(percent / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+def read_rss(pid):
+    """Текущий RSS процесса в байтах (только Linux) или None."""
+    try:
+        status = Path(f'/proc/{pid}/status').read_text()
+    except OSError:
+        return None
+    for line in status.splitlines():
+        if line.startswith('VmRSS:'):
+            return int(line.split()[1]) * 1024
+    return None
+
+
+class RssSampler(threading.Thread):
+    """Замеряет пиковый RSS процесса сервера, пока идёт нагрузка."""
+
+    def __init__(self, pid, interval=0.05):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.peak = None
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            rss = read_rss(self.pid)
+            if rss is not None:
+                self.peak = max(self.peak or 0, rss)
+            self.stopped.wait(self.interval)
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        return self.peak
+
+
+def request(host, port, path, headers):
+    connection = http.client.HTTPConnection(host, port, timeout=60)
+    try:
+        started = time.perf_counter()
+        connection.request('GET', path, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        return response.status, time.perf_counter() - started
+    finally:
+        connection.close()
+
+
+def drive(host, port, path, n_requests, concurrency, headers=None,
+          server_pid=None):
+    """Отправить n_requests запросов из concurrency потоков и собрать метрики.
+
+    Время ответа измеряется от отправки запроса до чтения тела.
+    """
+    headers = headers or {}
+    lock = threading.Lock()
+    remaining = [n_requests]
+    latencies = []
+    errors = []
+
+    def worker():
+        while True:
+            with lock:
+                if not remaining[0]:
+                    return
+                remaining[0] -= 1
+            try:
+                status, latency = request(host, port, path, headers)
+            except OSError as error:
+                with lock:
+                    errors.append(repr(error))
+                continue
+            with lock:
+                latencies.append(latency)
+                if status != 200:
+                    errors.append(status)
+
+    sampler = RssSampler(server_pid) if server_pid else None
+    if sampler:
+        sampler.start()
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'requests': n_requests,
+        'errors': len(errors),
+        'rps': round(len(latencies) / elapsed, 2),
+        **{
+            f'p{percent}_ms': round(percentile(latencies, percent) * 1000, 2)
+            if latencies else None
+            for percent in (50, 95, 99)
+        },
+        'peak_rss_bytes': sampler.stop() if sampler else None,
+    }
@@ -0,0 +1,118 @@
+import json
+import random
+from datetime import timedelta
+from pathlib import Path
+
+from benchmarks.environment import ROOT
+
+FIXTURE = ROOT / 'db.json'
+FIXTURE_EXCLUDE = ('admin.logentry', 'auth.permission', 'sessions')
+TEXT_POOL_SIZE = 1000
+BENCH_PASSWORD = 'bench-password'
+
+
+def metadata_path(database):
+    return Path(f'{database}.seed.json')
+
+
+def is_seeded(database, params):
+    path = metadata_path(database)
+    return (
+        Path(database).exists() and path.exists()
+        and json.loads(path.read_text()) == params
+    )
+
+
+def batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def seed(database, posts, comments, users, seed=0, batch_size=10000,
+         log=print):
+    """Наполнить базу фикстурой db.json и сгенерированными данными.
+
+    Тексты берутся из заранее созданного пула Faker, поэтому миллионы
+    строк вставляются пачками bulk_create без вызова Faker на каждую.
+    """
+    from django.core.management import call_command
+    from django.db import transaction
+    from django.db.models import Max, Min
+    from django.utils import timezone as dt
+    from faker import Faker
+
+    from blog.counters import rebuild_comment_counts
+    from blog.feeds import rebuild_feeds
+    from blog.models import Category, Comment, Location, Post, User
+
+    params = {
+        'posts': posts, 'comments': comments, 'users': users, 'seed': seed,
+    }
+    for path in (Path(database), metadata_path(database)):
+        path.unlink(missing_ok=True)
+    call_command('migrate', verbosity=0)
+    call_command(
+        'loaddata', FIXTURE, exclude=list(FIXTURE_EXCLUDE), verbosity=0
+    )
+    faker = Faker('ru_RU')
+    faker.seed_instance(seed)
+    rng = random.Random(seed)
+    titles = [faker.sentence(nb_words=4)[:256] for _ in range(TEXT_POOL_SIZE)]
+    texts = [faker.text(max_nb_chars=800) for _ in range(TEXT_POOL_SIZE)]
+    now = dt.now()
+
+    bench_users = [
+        User(username=f'bench{number}', first_name=faker.first_name())
+        for number in range(users)
+    ]
+    bench_users[0].set_password(BENCH_PASSWORD)
+    User.objects.bulk_create(bench_users)
+    user_ids = list(User.objects.values_list('id', flat=True))
+    category_ids = list(
+        Category.objects.filter(is_published=True)
+        .values_list('id', flat=True)
+    )
+    location_ids = list(Location.objects.values_list('id', flat=True))
+
+    def make_posts():
+        for _ in range(posts):
+            yield Post(
+                title=rng.choice(titles),
+                text=rng.choice(texts),
+                pub_date=now - timedelta(minutes=rng.randrange(525600)),
+                author_id=rng.choice(user_ids),
+                category_id=rng.choice(category_ids),
+                location_id=rng.choice(location_ids + [None]),
+                is_published=rng.random() < 0.95,
+                is_live=True,
+            )
+
+    for number, batch in enumerate(batches(make_posts(), batch_size), 1):
+        with transaction.atomic():
+            Post.objects.bulk_create(batch)
+        log(f'Посты: {min(number * batch_size, posts)}/{posts}')
+    bounds = Post.objects.aggregate(low=Min('id'), high=Max('id'))
+
+    def make_comments():
+        for _ in range(comments):
+            yield Comment(
+                text=rng.choice(titles),
+                post_id=rng.randint(bounds['low'], bounds['high']),
+                author_id=rng.choice(user_ids),
+            )
+
+    for number, batch in enumerate(batches(make_comments(), batch_size), 1):
+        with transaction.atomic():
+            Comment.objects.bulk_create(batch)
+        log(f'Комментарии: {min(number * batch_size, comments)}/{comments}')
+    rebuild_comment_counts()
+    log('Ленты категорий и авторов')
+    rebuild_feeds()
+    metadata_path(database).write_text(json.dumps(params))
+    return params
@@ -0,0 +1,35 @@
+"""Сервер для замеров: многопоточный WSGI из Django или uvicorn (ASGI).
+
+Запускается отдельным процессом командой `python -m benchmarks run`.
+"""
+import argparse
+import os
+
+from benchmarks.environment import setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, required=True)
+    parser.add_argument('--server', choices=('wsgi', 'uvicorn'))
+    options = parser.parse_args()
+    setup_django(
+        os.environ['BLOGICUM_SQLITE_PATH'],
+        os.environ.get('BLOGICUM_ASYNC_VIEWS') == '1',
+    )
+    if options.server == 'uvicorn':
+        import uvicorn
+
+        from blogicum.asgi import application
+
+        uvicorn.run(application, port=options.port, log_level='warning')
+        return
+    from django.core.servers.basehttp import run
+
+    from blogicum.wsgi import application
+
+    run('127.0.0.1', options.port, application, threading=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,25 @@
+"""Настройки проекта для замеров: без DEBUG и с базой из окружения."""
+import os
+
+from blogicum.settings import *  # noqa: F401,F403
+
+DEBUG = False
+
+ALLOWED_HOSTS = ['127.0.0.1', 'localhost', 'testserver']
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['BLOGICUM_SQLITE_PATH'],
+    }
+}
+
+READ_REPLICAS = []
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'loggers': {
+        'django.server': {'level': 'ERROR'},
+    },
+}
@@ -1,6 +1,49 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import PAGE_VAR
 
-from .models import Category, Comment, Location, Post
+from .lookups import get_tables, with_lookups
+from .models import Category, Comment, Job, Location, Post
+from .paginators import EstimatedCountPaginator
+
+
+class InputFilter(admin.SimpleListFilter):
+    """Фильтр с полем ввода вместо списка всех возможных значений."""
+
+    template = 'admin/input_filter.html'
+
+    def lookups(self, request, model_admin):
+        # Фильтр показывается, только если список вариантов не пуст.
+        return ((None, None),)
+
+    def choices(self, changelist):
+        yield {
+            'query_parts': [
+                (name, value) for name, value in changelist.params.items()
+                if name not in (self.parameter_name, PAGE_VAR)
+            ],
+        }
+
+
+class AuthorFilter(InputFilter):
+    title = 'автор (имя пользователя)'
+    parameter_name = 'author'
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(author__username=self.value().strip())
+        return queryset
+
+
+class PostFilter(InputFilter):
+    title = 'публикация (id)'
+    parameter_name = 'post'
+
+    def queryset(self, request, queryset):
+        if not self.value():
+            return queryset
+        if not self.value().strip().isdigit():
+            return queryset.none()
+        return queryset.filter(post_id=int(self.value()))
 
 
 @admin.register(Category)
@@ -38,6 +81,7 @@ class PostAdmin(admin.ModelAdmin):
         'location',
         'category',
         'is_published',
+        'is_live',
         'comments'
     )
 
@@ -47,16 +91,39 @@ class PostAdmin(admin.ModelAdmin):
     )
 
     list_editable = (
-        'author',
         'category',
         'is_published'
     )
+    list_select_related = ('author',)
     search_fields = ('title',)
-    list_filter = ('category', 'location', 'author')
+    list_filter = ('category', 'location', AuthorFilter, 'is_live')
+    autocomplete_fields = ('author',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        # Категории и местоположения берутся из таблиц в памяти.
+        return with_lookups(super().get_queryset(request))
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        field = super().formfield_for_foreignkey(db_field, request, **kwargs)
+        if db_field.name == 'category':
+            # Без этого каждая строка списка запрашивает все категории.
+            choices = [
+                (category.id, str(category))
+                for category in get_tables().categories.values()
+            ]
+            if field.empty_label is not None:
+                choices.insert(0, ('', field.empty_label))
+            field.choices = choices
+        return field
 
-    @admin.display(description='колличество комментариев',)
+    @admin.display(
+        description='колличество комментариев',
+        ordering='comment_count',
+    )
     def comments(self, obj):
-        return obj.comments.count()
+        return obj.comment_count
 
 
 @admin.register(Comment)
@@ -66,5 +133,25 @@ class CommentAdmin(admin.ModelAdmin):
         'post',
         'author'
     )
+    list_select_related = ('post', 'author')
     search_fields = ('author__username',)
-    list_filter = ('post', 'author')
+    list_filter = (PostFilter, AuthorFilter)
+    autocomplete_fields = ('post', 'author')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('post__text')
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'name',
+        'status',
+        'attempts',
+        'run_after',
+        'created_at',
+    )
+    list_filter = ('status', 'name')
+    readonly_fields = ('last_error',)
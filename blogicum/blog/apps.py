@@ -1,7 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blog'
     verbose_name = 'Блог'
+
+    def ready(self):
+        from blog import checks, signals  # noqa: F401
+        post_migrate.connect(signals.restore_search_index, sender=self)
+        post_migrate.connect(signals.restore_row_counters, sender=self)
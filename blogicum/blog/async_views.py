@@ -0,0 +1,155 @@
+"""Асинхронные версии читающих страниц блога.
+
+Под ASGI синхронные представления выполняются по одному в общем потоке,
+а здесь независимые запросы к БД идут параллельно в отдельных потоках.
+Маршруты переключаются настройкой BLOG_ASYNC_VIEWS.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.http import Http404
+from django.shortcuts import get_object_or_404, render
+
+from blog.cache import (cache_anonymous_page, conditional_page,
+                        feed_version_keys, post_version_keys)
+from blog.constants import LIMIT_FOR_PAGES
+from blog.forms import CommentForm
+from blog.feeds import FEED_ORDERING, feed_count_key, feed_posts
+from blog.lookups import published_category
+from blog.models import FeedEntry, User
+from blog.paginators import (POST_ORDERING, CursorPaginator,
+                             EstimatedCountPaginator)
+from blog.routers import read_replica
+from blog.views import (category_validators, cursor_requested,
+                        index_validators, order_by_date, paginate_comments,
+                        post_validators, profile_posts, profile_validators,
+                        select_posts, visible_post)
+
+
+def run_query(func, *args, **kwargs):
+    """Выполнить код ORM в отдельном потоке со своим соединением с БД.
+
+    Соединение закрывается по тем же правилам CONN_MAX_AGE, что и в
+    конце обычного запроса.
+    """
+    def call():
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return sync_to_async(call, thread_sensitive=False)()
+
+
+def page_number(request):
+    try:
+        return max(int(request.GET.get('page') or 1), 1)
+    except ValueError:
+        return 1
+
+
+async def paginate_posts(request, posts, limit, ordering=POST_ORDERING,
+                         count_key=None):
+    """Страница постов; число постов и сама страница читаются параллельно."""
+    if cursor_requested(request):
+        return await run_query(
+            CursorPaginator(posts, limit, ordering).get_page,
+            request.GET.get('cursor'),
+        )
+    number = page_number(request)
+    bottom = (number - 1) * limit
+    paginator = EstimatedCountPaginator(posts, limit, count_key=count_key)
+    _, rows = await asyncio.gather(
+        run_query(getattr, paginator, 'count'),
+        run_query(list, posts[bottom:bottom + limit]),
+    )
+    page_obj = paginator.get_page(number)
+    if page_obj.number == number:
+        page_obj.object_list = rows
+    else:
+        page_obj.object_list = await run_query(list, page_obj.object_list)
+    return page_obj
+
+
+async def load_user(request):
+    """Загрузить ленивого request.user, чтобы читать его без запросов."""
+    await sync_to_async(lambda: request.user.pk)()
+
+
+async def render_page(request, template_name, context):
+    return await sync_to_async(render)(request, template_name, context)
+
+
+@read_replica
+@cache_anonymous_page(feed_version_keys)
+@conditional_page(index_validators)
+async def index(request):
+    """Главная страница"""
+    posts = order_by_date(await sync_to_async(select_posts)())
+    page_obj = await paginate_posts(
+        request, posts, LIMIT_FOR_PAGES,
+        count_key=feed_count_key(FeedEntry.CATEGORY),
+    )
+    context = {
+        'page_obj': page_obj,
+    }
+    return await render_page(request, 'blog/index.html', context)
+
+
+@read_replica
+@cache_anonymous_page(post_version_keys)
+@conditional_page(post_validators)
+async def post_detail(request, post_id):
+    """Страница с информацией о посте"""
+    await load_user(request)
+    post, comments = await asyncio.gather(
+        run_query(visible_post, request, post_id),
+        run_query(paginate_comments, request, post_id),
+    )
+    context = {
+        'post': post,
+        'form': CommentForm(),
+        'comments': comments
+    }
+    return await render_page(request, 'blog/detail.html', context)
+
+
+@read_replica
+@cache_anonymous_page(feed_version_keys)
+@conditional_page(category_validators)
+async def category_posts(request, category_slug):
+    """Страница с категорией поста"""
+    category = await sync_to_async(published_category)(category_slug)
+    if category is None:
+        raise Http404
+    posts = feed_posts(FeedEntry.CATEGORY, category.id).order_by(
+        *FEED_ORDERING
+    )
+    page_obj = await paginate_posts(
+        request, posts, LIMIT_FOR_PAGES, FEED_ORDERING,
+        feed_count_key(FeedEntry.CATEGORY, category.id),
+    )
+    context = {
+        'category': category,
+        'page_obj': page_obj,
+    }
+    return await render_page(request, 'blog/category.html', context)
+
+
+@read_replica
+@conditional_page(profile_validators)
+async def profile(request, username):
+    """Страница с профилем"""
+    profile = await run_query(get_object_or_404, User, username=username)
+    posts, ordering, count_key = await sync_to_async(profile_posts)(
+        request, profile
+    )
+    page_obj = await paginate_posts(
+        request, posts, LIMIT_FOR_PAGES, ordering, count_key
+    )
+    context = {
+        'profile': profile,
+        'page_obj': page_obj,
+    }
+    return await render_page(request, 'blog/profile.html', context)
@@ -0,0 +1,278 @@
+from asyncio import iscoroutinefunction
+from functools import wraps
+from hashlib import md5
+from uuid import uuid4
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Min
+from django.utils import timezone as dt
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+from blog import metrics
+from blog.constants import PAGE_CACHE_TIMEOUT
+
+POST_VERSION_KEY = 'blog:post:{}:version'
+SHARED_VERSION_KEY = 'blog:shared:version'
+FEED_VERSION_KEY = 'blog:feed:version'
+LOOKUPS_VERSION_KEY = 'blog:lookups:version'
+POST_CARD_KEY = 'blog:post_card:{post}:{viewer}:{version}:{comments}'
+PAGE_KEY = 'blog:page:{path}:{version}'
+NEXT_PUB_DATE_KEY = 'blog:next_pub_date:{version}'
+RECENT_WRITE_KEY = 'blog:recent_write'
+
+
+def get_version(key):
+    """Текущая версия по ключу; при отсутствии создаётся новая."""
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def bump_versions(keys):
+    """Сменить версии и на время отставания реплик читать из основной БД.
+
+    Иначе страница, карточка или ETag, собранные по старым данным реплики,
+    попали бы в кэш уже под новой версией.
+    """
+    cache.set_many({key: uuid4().hex for key in keys}, None)
+    if settings.READ_REPLICAS:
+        cache.set(RECENT_WRITE_KEY, True, settings.REPLICA_STICKY_SECONDS)
+
+
+def replicas_may_lag():
+    """Были ли изменения за последние REPLICA_STICKY_SECONDS секунд."""
+    return cache.get(RECENT_WRITE_KEY, False)
+
+
+def bump_version(key):
+    bump_versions((key,))
+
+
+def bump_post(post_id):
+    bump_versions((POST_VERSION_KEY.format(post_id), FEED_VERSION_KEY))
+
+
+def bump_posts(post_ids):
+    """Сбросить версии сразу нескольких постов и ленты."""
+    bump_versions([
+        *(POST_VERSION_KEY.format(post_id) for post_id in post_ids),
+        FEED_VERSION_KEY,
+    ])
+
+
+def bump_shared():
+    """Сбросить фрагменты всех постов: категории, места, авторы."""
+    bump_versions((SHARED_VERSION_KEY, FEED_VERSION_KEY))
+
+
+def bump_lookups():
+    """Перечитать категории и местоположения во всех процессах."""
+    bump_versions(
+        (LOOKUPS_VERSION_KEY, SHARED_VERSION_KEY, FEED_VERSION_KEY)
+    )
+
+
+def viewer_class(user, post):
+    if not user or not user.is_authenticated:
+        return 'anon'
+    if user.pk == post.author_id:
+        return 'author'
+    return 'user'
+
+
+def post_card_key(post, user):
+    keys = (POST_VERSION_KEY.format(post.pk), SHARED_VERSION_KEY)
+    versions = cache.get_many(keys)
+    return POST_CARD_KEY.format(
+        post=post.pk,
+        viewer=viewer_class(user, post),
+        version='-'.join(
+            versions.get(key) or get_version(key) for key in keys
+        ),
+        comments=post.comment_count,
+    )
+
+
+def feed_version_keys(request, **kwargs):
+    return (FEED_VERSION_KEY,)
+
+
+def post_version_keys(request, post_id, **kwargs):
+    return (POST_VERSION_KEY.format(post_id), SHARED_VERSION_KEY)
+
+
+def next_pub_date():
+    """Ближайшая дата отложенной публикации или None."""
+    from blog.models import Post
+
+    key = NEXT_PUB_DATE_KEY.format(version=get_version(FEED_VERSION_KEY))
+    cached = cache.get(key)
+    if cached is None:
+        pub_date = Post.objects.filter(
+            is_published=True, pub_date__gt=dt.now()
+        ).aggregate(next_pub_date=Min('pub_date'))['next_pub_date']
+        cached = (pub_date,)
+        cache.set(key, cached, page_timeout(pub_date))
+    return cached[0]
+
+
+def page_timeout(pub_date):
+    """Время жизни страницы, не дольше момента выхода отложенного поста."""
+    if pub_date is None:
+        return PAGE_CACHE_TIMEOUT
+    seconds = int((pub_date - dt.now()).total_seconds())
+    return max(0, min(PAGE_CACHE_TIMEOUT, seconds))
+
+
+def anonymous_page_key(request, get_version_keys, kwargs):
+    """Ключ страницы в кэше или None, если ответ кэшировать нельзя."""
+    if request.method != 'GET' or request.user.is_authenticated:
+        return None
+    return PAGE_KEY.format(
+        path=request.get_full_path(),
+        version='-'.join(
+            get_version(version_key)
+            for version_key in get_version_keys(request, **kwargs)
+        ),
+    )
+
+
+def cached_page(request, key):
+    response = cache.get(key)
+    metrics.cache_requests.inc(
+        cache='page', result='miss' if response is None else 'hit'
+    )
+    if response is None:
+        return None
+    return get_conditional_response(
+        request,
+        etag=response.get('ETag'),
+        last_modified=parse_http_date_safe(
+            response.get('Last-Modified', '')
+        ),
+        response=response,
+    )
+
+
+def store_page(key, response):
+    timeout = page_timeout(next_pub_date())
+    if response.status_code == 200 and not response.cookies and timeout:
+        cache.set(key, response, timeout)
+
+
+def cache_anonymous_page(get_version_keys):
+    """Кэшировать ответы анонимным пользователям до изменения версий."""
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                key = await sync_to_async(anonymous_page_key)(
+                    request, get_version_keys, kwargs
+                )
+                if key is None:
+                    return await view(request, *args, **kwargs)
+                response = await sync_to_async(cached_page)(request, key)
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                    await sync_to_async(store_page)(key, response)
+                return response
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key = anonymous_page_key(request, get_version_keys, kwargs)
+            if key is None:
+                return view(request, *args, **kwargs)
+            response = cached_page(request, key)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                store_page(key, response)
+            return response
+        return wrapper
+    return decorator
+
+
+def make_etag(request, *parts):
+    """Вычислить ETag ответа для конкретного пользователя и адреса страницы."""
+    raw = ':'.join(
+        str(part) for part in (request.user.pk, request.get_full_path())
+        + parts
+    )
+    return quote_etag(md5(raw.encode()).hexdigest())
+
+
+def csrf_etag(request, etag):
+    """Привязать ETag страницы с формами к CSRF-секрету пользователя.
+
+    Секрет меняется при входе, и 304 не должен возвращать форму со старым
+    токеном. Если cookie ещё нет, его выдаёт рендеринг страницы, поэтому
+    после view ETag считается заново.
+    """
+    token = request.META.get('CSRF_COOKIE')
+    if not etag or token is None or not request.user.is_authenticated:
+        return etag
+    return quote_etag(md5(f'{etag}:{token}'.encode()).hexdigest())
+
+
+def check_conditions(request, get_validators, kwargs):
+    """Вернуть (ответ 304 или None, etag, timestamp) для запроса."""
+    etag, last_modified = get_validators(request, **kwargs)
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(
+        request, etag=csrf_etag(request, etag), last_modified=timestamp
+    )
+    return response, etag, timestamp
+
+
+def add_validators(request, response, etag, timestamp):
+    if response.status_code == 200:
+        etag = csrf_etag(request, etag)
+        if etag:
+            response.headers.setdefault('ETag', etag)
+        if timestamp:
+            response.headers.setdefault('Last-Modified', http_date(timestamp))
+    return response
+
+
+def conditional_page(get_validators):
+    """Отвечать 304 Not Modified по ETag и Last-Modified без рендеринга.
+
+    `get_validators(request, **kwargs)` возвращает пару (etag, datetime)
+    или (None, None), если валидаторы посчитать нельзя.
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return await view(request, *args, **kwargs)
+                response, etag, timestamp = await sync_to_async(
+                    check_conditions
+                )(request, get_validators, kwargs)
+                if response is not None:
+                    return response
+                return add_validators(
+                    request, await view(request, *args, **kwargs),
+                    etag, timestamp,
+                )
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            response, etag, timestamp = check_conditions(
+                request, get_validators, kwargs
+            )
+            if response is not None:
+                return response
+            return add_validators(
+                request, view(request, *args, **kwargs), etag, timestamp
+            )
+        return wrapper
+    return decorator
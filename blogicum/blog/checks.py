@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register()
+def shared_cache_check(app_configs, **kwargs):
+    """Версии кэшей и таблиц категорий требуют общего для процессов кэша."""
+    backend = settings.CACHES['default']['BACKEND']
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Warning(
+        'Кэш default не общий для процессов сервера.',
+        hint=(
+            'Изменения категорий и публикаций увидит только процесс, который'
+            ' их сделал. Задайте общий кэш через BLOGICUM_CACHE_BACKEND.'
+        ),
+        id='blog.W001',
+    )]
@@ -3,3 +3,10 @@ REPRESENTATION_LENGHT = 20
 POSTS_BY_PAGE = 5
 TITLE_LETTER_LIMIT: int = 30
 LIMIT_FOR_PAGES = 10
+POST_CARD_TIMEOUT = 60 * 60
+PAGE_CACHE_TIMEOUT = 60 * 5
+COMMENTS_BY_PAGE = 20
+THUMBNAIL_WIDTHS = (320, 640, 960)
+THUMBNAIL_QUALITY = 80
+# Ниже этой оценки число строк считается точным COUNT(*).
+EXACT_COUNT_THRESHOLD = 10000
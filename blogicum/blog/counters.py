@@ -0,0 +1,132 @@
+from django.db import connections
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from blog.models import Comment, Post
+
+# Ключи счётчиков строк для каждой таблицы: SQL-выражения от строки
+# {row}. Ключи лент совпадают с feeds.feed_count_key.
+COUNTED_TABLES = {
+    'blog_post': ("'blog_post'",),
+    'blog_comment': ("'blog_comment'",),
+    'blog_feedentry': (
+        "'feed:' || {row}.kind",
+        "'feed:' || {row}.kind || ':' || {row}.owner_id",
+    ),
+}
+COUNTER_INCREMENT = (
+    'INSERT INTO blog_rowcount(key, count) VALUES ({key}, 1)'
+    ' ON CONFLICT(key) DO UPDATE SET count = count + 1;'
+)
+COUNTER_DECREMENT = (
+    'UPDATE blog_rowcount SET count = count - 1 WHERE key = {key};'
+)
+
+
+def counter_triggers():
+    """Имена и SQL триггеров SQLite, ведущих таблицу blog_rowcount."""
+    for table, keys in COUNTED_TABLES.items():
+        added = ' '.join(
+            COUNTER_INCREMENT.format(key=key.format(row='new'))
+            for key in keys
+        )
+        removed = ' '.join(
+            COUNTER_DECREMENT.format(key=key.format(row='old'))
+            for key in keys
+        )
+        yield f'{table}_count_ai', (
+            f'AFTER INSERT ON {table} BEGIN {added} END'
+        )
+        yield f'{table}_count_ad', (
+            f'AFTER DELETE ON {table} BEGIN {removed} END'
+        )
+        if table == 'blog_feedentry':
+            yield f'{table}_count_au', (
+                f'AFTER UPDATE OF kind, owner_id ON {table}'
+                f' BEGIN {removed} {added} END'
+            )
+
+
+SQLITE_COUNTER_TRIGGERS = dict(counter_triggers())
+
+
+def change_comment_count(post_id, delta):
+    """Атомарно изменить счётчик комментариев поста на `delta`.
+
+    Счётчик не опускается ниже нуля, даже если он уже разошёлся с
+    настоящим числом комментариев.
+    """
+    Post.objects.filter(pk=post_id).update(
+        comment_count=Greatest(F('comment_count') + delta, 0)
+    )
+
+
+def rebuild_comment_counts(posts=None):
+    """Пересчитать счётчики комментариев; вернуть число исправленных постов."""
+    counts = Comment.objects.filter(post=OuterRef('pk')).order_by().values(
+        'post'
+    ).annotate(total=Count('pk')).values('total')
+    actual = Coalesce(
+        Subquery(counts, output_field=IntegerField()), 0
+    )
+    posts = (Post.objects.all() if posts is None else posts).annotate(
+        actual_count=actual
+    ).exclude(comment_count=F('actual_count'))
+    return Post.objects.filter(pk__in=posts.values('pk')).update(
+        comment_count=actual
+    )
+
+
+def rebuild_row_counts(using='default'):
+    """Пересчитать таблицу blog_rowcount по текущим строкам."""
+    with connections[using].cursor() as cursor:
+        cursor.execute('DELETE FROM blog_rowcount')
+        for table, keys in COUNTED_TABLES.items():
+            for key in keys:
+                key = key.format(row=table)
+                cursor.execute(
+                    'INSERT INTO blog_rowcount(key, count)'
+                    f' SELECT {key}, COUNT(*) FROM {table} GROUP BY {key}'
+                )
+
+
+def install_row_counters(using='default'):
+    """Создать недостающие триггеры счётчиков строк в SQLite.
+
+    Если хотя бы один триггер пришлось создать, счётчики пересчитываются.
+    В PostgreSQL число строк оценивает планировщик, таблица не ведётся.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+        )
+        existing = {name for name, in cursor.fetchall()}
+        missing = set(SQLITE_COUNTER_TRIGGERS) - existing
+        for name in missing:
+            cursor.execute(
+                f'CREATE TRIGGER {name} {SQLITE_COUNTER_TRIGGERS[name]}'
+            )
+    if missing:
+        rebuild_row_counts(using)
+
+
+def repair_row_counters(using='default'):
+    """Восстановить триггеры, удалённые пересозданием таблиц в migrate."""
+    connection = connections[using]
+    if (
+        connection.vendor == 'sqlite'
+        and 'blog_rowcount' in connection.introspection.table_names()
+    ):
+        install_row_counters(using)
+
+
+def uninstall_row_counters(using='default'):
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name in SQLITE_COUNTER_TRIGGERS:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
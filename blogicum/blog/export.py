@@ -0,0 +1,109 @@
+import csv
+import io
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+
+from blog.models import Comment, Post
+
+# Поля выгрузки; имена совпадают с форматом команды import_blog.
+EXPORTS = {
+    'post': (Post, {
+        'id': F('id'),
+        'title': F('title'),
+        'text': F('text'),
+        'pub_date': F('pub_date'),
+        'created_at': F('created_at'),
+        'updated_at': F('updated_at'),
+        'is_published': F('is_published'),
+        'comment_count': F('comment_count'),
+        'image': F('image'),
+        'author': F('author__username'),
+        'category': F('category__slug'),
+        'location': F('location__name'),
+    }),
+    'comment': (Comment, {
+        'id': F('id'),
+        'post': F('post_id'),
+        'text': F('text'),
+        'created_at': F('created_at'),
+        'author': F('author__username'),
+    }),
+}
+FORMATS = ('jsonl', 'csv')
+
+
+def keyset_batches(model, columns, batch_size):
+    """Строки таблицы пачками по возрастанию id без OFFSET.
+
+    Каждая пачка — отдельный запрос с JOIN авторов, категорий и мест,
+    поэтому в памяти одновременно не больше batch_size строк.
+    """
+    # Временные имена не должны совпадать с полями модели.
+    aliases = {f'export_{name}': expression
+               for name, expression in columns.items()}
+    queryset = model.objects.order_by('id').values(**aliases)
+    last_id = 0
+    while True:
+        batch = list(queryset.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            return
+        last_id = batch[-1]['export_id']
+        yield [
+            {name: row[f'export_{name}'] for name in columns}
+            for row in batch
+        ]
+
+
+def jsonl_lines(model_name, batch):
+    return ''.join(
+        json.dumps(
+            {'model': model_name, **row}, cls=DjangoJSONEncoder,
+            ensure_ascii=False,
+        ) + '\n'
+        for row in batch
+    )
+
+
+def csv_lines(columns, batch, header):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(columns))
+    if header:
+        writer.writeheader()
+    writer.writerows(batch)
+    return buffer.getvalue()
+
+
+def export_chunks(model_names, file_format='jsonl', compress=False,
+                  batch_size=2000):
+    """Байты выгрузки по частям, при compress — в формате gzip.
+
+    В CSV выгружается одна модель: у постов и комментариев разные
+    столбцы. JSON Lines может содержать обе, каждая запись с полем model.
+    """
+    if file_format == 'csv' and len(model_names) != 1:
+        raise ValueError('CSV выгружает ровно одну модель')
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    for model_name in model_names:
+        model, columns = EXPORTS[model_name]
+        header = True
+        for batch in keyset_batches(model, columns, batch_size):
+            if file_format == 'csv':
+                text = csv_lines(columns, batch, header)
+                header = False
+            else:
+                text = jsonl_lines(model_name, batch)
+            data = text.encode('utf-8')
+            if compressor:
+                data = compressor.compress(data)
+            if data:
+                yield data
+    if compressor:
+        yield compressor.flush()
+
+
+def export_filename(model_names, file_format, compress):
+    name = f'blog-{"-".join(model_names)}.{file_format}'
+    return f'{name}.gz' if compress else name
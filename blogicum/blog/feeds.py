@@ -0,0 +1,134 @@
+"""Материализованные ленты категорий и авторов.
+
+FeedEntry хранит по две строки на каждый видимый всем пост: в ленте его
+категории и в ленте его автора. Страница ленты читается диапазоном
+индекса (kind, owner_id, pub_date, post) и соединяется с постами по
+первичному ключу, без фильтров по всей таблице постов.
+"""
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import F
+
+from blog.lookups import get_tables, with_lookups
+from blog.models import FeedEntry, Post
+
+FEED_BATCH_SIZE = 1000
+FEED_FIELDS = ('is_live', 'is_published', 'category_id', 'author_id',
+               'pub_date')
+UNKNOWN = object()
+# Порядок страниц ленты; поля — аннотации из feed_posts.
+FEED_ORDERING = ('-feed_pub_date', '-feed_post_id')
+
+
+def feed_count_key(kind, owner_id=None):
+    """Ключ счётчика строк ленты в blog_rowcount.
+
+    Без owner_id — все строки ленты этого вида; строк категорий столько
+    же, сколько постов на главной.
+    """
+    if owner_id is None:
+        return f'feed:{kind}'
+    return f'feed:{kind}:{owner_id}'
+
+
+def visible_posts():
+    """Посты, которые видят все: источник истины для лент."""
+    return Post.objects.filter(
+        is_live=True, is_published=True, category__is_published=True
+    )
+
+
+def entries_for(rows):
+    for post_id, category_id, author_id, pub_date in rows:
+        yield FeedEntry(
+            kind=FeedEntry.CATEGORY, owner_id=category_id,
+            pub_date=pub_date, post_id=post_id,
+        )
+        yield FeedEntry(
+            kind=FeedEntry.AUTHOR, owner_id=author_id,
+            pub_date=pub_date, post_id=post_id,
+        )
+
+
+def insert_entries(entries):
+    while True:
+        batch = list(islice(entries, FEED_BATCH_SIZE))
+        if not batch:
+            return
+        FeedEntry.objects.bulk_create(batch)
+
+
+def refresh_feeds(posts):
+    """Пересобрать строки лент для постов из queryset `posts`."""
+    with transaction.atomic():
+        FeedEntry.objects.filter(post__in=posts.values('pk')).delete()
+        insert_entries(entries_for(
+            visible_posts().filter(pk__in=posts.values('pk')).values_list(
+                'id', 'category_id', 'author_id', 'pub_date'
+            ).iterator(chunk_size=FEED_BATCH_SIZE)
+        ))
+
+
+def rebuild_feeds():
+    refresh_feeds(Post.objects.all())
+
+
+def feed_state(post):
+    """Поля поста, от которых зависят его строки в лентах.
+
+    None — пост не виден в лентах, UNKNOWN — поля загружены не все.
+    Читаем __dict__ напрямую, чтобы не загружать отложенные поля.
+    """
+    values = [post.__dict__.get(name, UNKNOWN) for name in FEED_FIELDS]
+    if UNKNOWN in values:
+        return UNKNOWN
+    is_live, is_published, category_id, author_id, pub_date = values
+    if not (is_live and is_published and category_id):
+        return None
+    return category_id, author_id, pub_date
+
+
+def sync_post(post, created=False):
+    """Обновить ленты после сохранения поста.
+
+    Правка без изменения категории, автора, даты и видимости поста не
+    трогает ленты. Публикацию категории берём из таблиц в памяти, а её
+    переключение пересобирает ленту категории по данным БД.
+    """
+    state = feed_state(post)
+    stored = UNKNOWN if created else getattr(post, '_feed_state', UNKNOWN)
+    post._feed_state = state
+    if state == stored and state is not UNKNOWN:
+        return
+    if not created and stored is not None:
+        FeedEntry.objects.filter(post=post).delete()
+    if state and state[0] in get_tables().published_category_ids:
+        FeedEntry.objects.bulk_create(entries_for([(post.id, *state)]))
+
+
+def feed_posts(kind, owner_id):
+    """Посты ленты; упорядочивать по FEED_ORDERING."""
+    return with_lookups(Post.objects.select_related('author')).filter(
+        feed_entries__kind=kind, feed_entries__owner_id=owner_id
+    ).annotate(
+        feed_pub_date=F('feed_entries__pub_date'),
+        feed_post_id=F('feed_entries__post_id'),
+    )
+
+
+def diff_feeds():
+    """Сравнить ленты с постами; вернуть (недостающие, лишние) строки.
+
+    Строка — кортеж (kind, owner_id, post_id, pub_date).
+    """
+    expected = {
+        (entry.kind, entry.owner_id, entry.post_id, entry.pub_date)
+        for entry in entries_for(visible_posts().values_list(
+            'id', 'category_id', 'author_id', 'pub_date'
+        ).iterator(chunk_size=FEED_BATCH_SIZE))
+    }
+    actual = set(FeedEntry.objects.values_list(
+        'kind', 'owner_id', 'post_id', 'pub_date'
+    ).iterator(chunk_size=FEED_BATCH_SIZE))
+    return expected - actual, actual - expected
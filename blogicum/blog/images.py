@@ -0,0 +1,69 @@
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from blog.constants import THUMBNAIL_QUALITY, THUMBNAIL_WIDTHS
+
+# Расширение миниатюры и формат Pillow.
+THUMBNAIL_FORMATS = {
+    'webp': 'WEBP',
+    'jpg': 'JPEG',
+}
+
+
+def thumbnail_name(name, width, extension):
+    root, _ = os.path.splitext(name)
+    return f'{root}_w{width}.{extension}'
+
+
+def thumbnail_names(name):
+    return [
+        thumbnail_name(name, width, extension)
+        for width in THUMBNAIL_WIDTHS
+        for extension in THUMBNAIL_FORMATS
+    ]
+
+
+def make_thumbnails(image_field, overwrite=True):
+    """Сохранить рядом с оригиналом уменьшенные копии во всех форматах.
+
+    Копии шире оригинала не увеличиваются, а сохраняются в исходном
+    размере, чтобы набор файлов для srcset всегда был одинаковым.
+    """
+    storage = image_field.storage
+    with image_field.open('rb') as original:
+        image = ImageOps.exif_transpose(Image.open(original))
+        image = image.convert('RGB')
+    created = []
+    for width in THUMBNAIL_WIDTHS:
+        resized = image.copy()
+        resized.thumbnail((width, width * 10), Image.Resampling.LANCZOS)
+        for extension, image_format in THUMBNAIL_FORMATS.items():
+            name = thumbnail_name(image_field.name, width, extension)
+            if storage.exists(name):
+                if not overwrite:
+                    continue
+                storage.delete(name)
+            buffer = BytesIO()
+            resized.save(
+                buffer, image_format, quality=THUMBNAIL_QUALITY,
+                optimize=True,
+            )
+            created.append(storage.save(name, ContentFile(buffer.getvalue())))
+    return created
+
+
+def delete_thumbnails(name, storage):
+    for thumbnail in thumbnail_names(name):
+        storage.delete(thumbnail)
+
+
+def srcset(image_field, extension):
+    storage = image_field.storage
+    return ', '.join(
+        f'{storage.url(thumbnail_name(image_field.name, width, extension))}'
+        f' {width}w'
+        for width in THUMBNAIL_WIDTHS
+    )
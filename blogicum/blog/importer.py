@@ -0,0 +1,231 @@
+import csv
+import json
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from functools import lru_cache
+
+from django.core.exceptions import ValidationError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone as dt
+
+from blog.cache import bump_lookups
+from blog.counters import rebuild_comment_counts
+from blog.feeds import rebuild_feeds
+from blog.models import Category, Comment, Location, Post, User
+
+# Порядок вставки внутри пачки: сначала те, на кого ссылаются.
+MODELS = {
+    'user': User,
+    'category': Category,
+    'location': Location,
+    'post': Post,
+    'comment': Comment,
+}
+NATURAL_KEYS = {User: 'username', Category: 'slug', Location: 'name'}
+TRUE_VALUES = ('1', 'true', 't', 'yes', 'y')
+
+
+class ImportRowError(ValueError):
+    """Запись нельзя импортировать; она пропускается."""
+
+
+def read_records(file, file_format):
+    """Читать записи из файла по одной, не загружая его целиком."""
+    if file_format == 'csv':
+        yield from csv.DictReader(file)
+        return
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def normalize(record, default_model=None):
+    """Вернуть (модель, поля) для плоской записи или записи dumpdata."""
+    record = dict(record)
+    label = record.pop('model', None) or default_model
+    if not label:
+        raise ImportRowError('Не указана модель записи')
+    model = MODELS.get(label.lower().rsplit('.', 1)[-1])
+    if model is None:
+        raise ImportRowError(f'Неизвестная модель {label}')
+    if 'fields' in record:
+        fields = dict(record['fields'])
+        if record.get('pk') is not None:
+            fields['id'] = record['pk']
+        record = fields
+    return model, record
+
+
+@contextmanager
+def keep_timestamps(model):
+    """Сохранить даты из источника вместо auto_now и auto_now_add.
+
+    Поля модели меняются на время вставки, поэтому менеджер контекста
+    предназначен только для команд импорта, а не для веб-процессов.
+    """
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield fields
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Importer:
+    """Вставка записей пачками bulk_create с разрешением ссылок в памяти.
+
+    Авторы, категории и местоположения ищутся по id или естественному
+    ключу (username, slug, name) в словарях, загруженных один раз;
+    существование постов для комментариев проверяется одним запросом
+    на пачку. Записи с явным id, уже существующие в базе, пропускаются,
+    поэтому пачку можно безопасно повторить.
+    """
+
+    def __init__(self):
+        self.keys = {}
+        self.ids = {}
+        for model, key in NATURAL_KEYS.items():
+            pairs = list(model.objects.values_list(key, 'id'))
+            self.keys[model] = {}
+            for natural_key, pk in pairs:
+                self.keys[model].setdefault(natural_key, pk)
+            self.ids[model] = {pk for _, pk in pairs}
+        self.post_ids = set()
+        self.inserted = Counter()
+        self.skipped = Counter()
+        self.errors = []
+        self.ignored_fields = defaultdict(set)
+
+    def import_chunk(self, records, default_model=None):
+        """Импортировать пачку записей в одной транзакции."""
+        buckets = defaultdict(list)
+        for record in records:
+            try:
+                model, row = normalize(record, default_model)
+            except ImportRowError as error:
+                self.skip(None, error)
+                continue
+            buckets[model].append(row)
+        with transaction.atomic():
+            for model in MODELS.values():
+                if buckets[model]:
+                    self.insert(model, buckets[model])
+
+    def skip(self, model, error):
+        self.skipped[model._meta.model_name if model else 'unknown'] += 1
+        if len(self.errors) < 100:
+            self.errors.append(str(error))
+
+    def insert(self, model, rows):
+        if model is Comment:
+            references = (row.get('post', row.get('post_id')) for row in rows)
+            self.post_ids = set(Post.objects.filter(id__in={
+                int(pk) for pk in references if str(pk).isdigit()
+            }).values_list('id', flat=True))
+        objects = []
+        with keep_timestamps(model) as timestamp_fields:
+            for row in rows:
+                try:
+                    objects.append(self.build(model, row, timestamp_fields))
+                except (ImportRowError, ValidationError, ValueError) as error:
+                    self.skip(model, error)
+            model.objects.bulk_create(objects, ignore_conflicts=True)
+        self.inserted[model._meta.model_name] += len(objects)
+        if model in NATURAL_KEYS:
+            self.remember(model, objects)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def fields_by_name(model):
+        return {
+            name: field
+            for field in model._meta.concrete_fields
+            for name in {field.name, field.attname}
+        }
+
+    def build(self, model, row, timestamp_fields):
+        fields = self.fields_by_name(model)
+        values = {}
+        for name, value in row.items():
+            field = fields.get(name)
+            if field is None:
+                self.ignored_fields[model._meta.model_name].add(name)
+                continue
+            if field.is_relation:
+                values[field.attname] = self.resolve(field, value)
+            else:
+                values[field.attname] = self.convert(field, value)
+        for field in timestamp_fields:
+            if values.get(field.attname) is None:
+                values[field.attname] = dt.now()
+        instance = model(**values)
+        if model is User and not instance.password:
+            instance.set_unusable_password()
+        if model is Post:
+            instance.refresh_is_live()
+        return instance
+
+    def convert(self, field, value):
+        if value == '' and (field.null or field.primary_key):
+            return None
+        if field.get_internal_type() == 'BooleanField' and isinstance(
+            value, str
+        ):
+            return value.strip().lower() in TRUE_VALUES
+        value = field.to_python(value)
+        if (
+            field.get_internal_type() == 'DateTimeField'
+            and value is not None and dt.is_naive(value)
+        ):
+            value = dt.make_aware(value)
+        return value
+
+    def resolve(self, field, value):
+        if value in (None, ''):
+            if field.null:
+                return None
+            raise ImportRowError(f'Не указано поле {field.name}')
+        model = field.related_model
+        if model is Post:
+            pk = int(value)
+            if pk not in self.post_ids:
+                raise ImportRowError(f'Нет публикации {pk}')
+            return pk
+        if isinstance(value, int) or str(value).isdigit():
+            if int(value) in self.ids[model]:
+                return int(value)
+        if value in self.keys[model]:
+            return self.keys[model][value]
+        raise ImportRowError(
+            f'Не найден {model._meta.verbose_name} {value!r}'
+        )
+
+    def remember(self, model, objects):
+        key = NATURAL_KEYS[model]
+        pairs = model.objects.filter(
+            **{f'{key}__in': [getattr(obj, key) for obj in objects]}
+        ).values_list(key, 'id')
+        for natural_key, pk in pairs:
+            self.keys[model].setdefault(natural_key, pk)
+            self.ids[model].add(pk)
+
+    def finish(self):
+        """Пересчитать счётчики и ленты, сдвинуть последовательности."""
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), list(MODELS.values())
+        )
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+        fixed = rebuild_comment_counts()
+        rebuild_feeds()
+        bump_lookups()
+        return fixed
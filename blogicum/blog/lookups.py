@@ -0,0 +1,104 @@
+"""Категории и местоположения в памяти процесса.
+
+Таблицы маленькие и меняются редко, поэтому каждый процесс держит их
+целиком и перечитывает, когда меняется версия LOOKUPS_VERSION_KEY в общем
+кэше, но не реже раза в LOOKUPS_MAX_AGE секунд. Лента не соединяет посты
+с этими таблицами: категория и место подставляются в посты из памяти,
+а фильтр по опубликованным категориям становится условием на category_id.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.query import ModelIterable
+
+from blog.cache import LOOKUPS_VERSION_KEY, get_version
+from blog.models import Category, Location, Post
+
+_lock = threading.Lock()
+_tables = None
+
+
+class LookupTables:
+    """Снимок таблиц для одной версии; объекты в нём только для чтения."""
+
+    def __init__(self, version):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        # Чтение из основной БД: реплика может отставать от новой версии.
+        self.categories = {
+            category.id: category
+            for category in Category.objects.using(DEFAULT_DB_ALIAS)
+        }
+        self.locations = {
+            location.id: location
+            for location in Location.objects.using(DEFAULT_DB_ALIAS)
+        }
+        self.published_categories = {
+            category.slug: category
+            for category in self.categories.values()
+            if category.is_published
+        }
+        self.published_category_ids = frozenset(
+            category.id for category in self.published_categories.values()
+        )
+
+
+def is_stale(tables, version):
+    return (
+        tables is None or tables.version != version
+        or time.monotonic() - tables.loaded_at > settings.LOOKUPS_MAX_AGE
+    )
+
+
+def get_tables():
+    """Таблицы текущей версии; перечитываются после изменения версии."""
+    global _tables
+    version = get_version(LOOKUPS_VERSION_KEY)
+    tables = _tables
+    if is_stale(tables, version):
+        with _lock:
+            tables = _tables
+            if is_stale(tables, version):
+                tables = _tables = LookupTables(version)
+    return tables
+
+
+def published_category(slug):
+    """Опубликованная категория по slug или None."""
+    return get_tables().published_categories.get(slug)
+
+
+def published_category_ids():
+    return get_tables().published_category_ids
+
+
+class LookupIterable(ModelIterable):
+    """Посты с категорией и местоположением из таблиц в памяти.
+
+    Если пост ссылается на запись, которой ещё нет в снимке, связь
+    загрузится обычным запросом при обращении.
+    """
+
+    fields = (
+        (Post._meta.get_field('category'), 'categories'),
+        (Post._meta.get_field('location'), 'locations'),
+    )
+
+    def __iter__(self):
+        tables = get_tables()
+        for post in super().__iter__():
+            for field, table_name in self.fields:
+                related_id = getattr(post, field.attname)
+                table = getattr(tables, table_name)
+                if related_id is None or related_id in table:
+                    field.set_cached_value(post, table.get(related_id))
+            yield post
+
+
+def with_lookups(queryset):
+    """Подставлять в посты категории и местоположения без JOIN."""
+    queryset = queryset._chain()
+    queryset._iterable_class = LookupIterable
+    return queryset
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.cache import bump_shared
+from blog.feeds import diff_feeds, refresh_feeds
+from blog.models import Post
+
+SHOWN_DIFFERENCES = 10
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет материализованные ленты категорий и авторов с постами;'
+        ' с --fix пересобирает расходящиеся строки'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix', action='store_true',
+            help='Исправить найденные расхождения',
+        )
+
+    def handle(self, *args, **options):
+        missing, extra = diff_feeds()
+        if not missing and not extra:
+            self.stdout.write(self.style.SUCCESS('Ленты согласованы'))
+            return
+        for title, rows in (('Нет в ленте', missing), ('Лишняя', extra)):
+            for kind, owner_id, post_id, pub_date in sorted(
+                rows, key=lambda row: row[:3]
+            )[:SHOWN_DIFFERENCES]:
+                self.stdout.write(
+                    f'  {title}: {kind} {owner_id}, пост {post_id}'
+                    f' от {pub_date:%Y-%m-%d %H:%M}'
+                )
+        summary = f'Недостающих строк: {len(missing)}, лишних: {len(extra)}'
+        if not options['fix']:
+            raise CommandError(summary)
+        post_ids = {row[2] for row in missing | extra}
+        refresh_feeds(Post.objects.filter(id__in=post_ids))
+        bump_shared()
+        self.stdout.write(self.style.SUCCESS(
+            f'{summary}; пересобраны ленты постов: {len(post_ids)}'
+        ))
@@ -0,0 +1,73 @@
+import re
+
+from django.core.management.base import BaseCommand
+
+from blog.cache import bump_post
+from blog.images import delete_thumbnails, make_thumbnails
+from blog.models import Post
+from blog.storage import (POST_IMAGES_DIR, file_digest, hashed_name,
+                          image_references)
+
+HASHED_NAME_RE = re.compile(
+    rf'^{POST_IMAGES_DIR}/[0-9a-f]{{2}}/[0-9a-f]{{64}}(\.\w+)?$'
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит загруженные ранее изображения публикаций в хранилище'
+        ' по хешу содержимого и удаляет дубликаты'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только посчитать, сколько места освободится',
+        )
+
+    def handle(self, *args, **options):
+        storage = Post._meta.get_field('image').storage
+        names = (
+            Post.objects.exclude(image='').order_by()
+            .values_list('image', flat=True).distinct()
+        )
+        renamed = {}
+        for name in names.iterator():
+            if HASHED_NAME_RE.match(name):
+                continue
+            try:
+                with storage.open(name) as file:
+                    renamed[name] = hashed_name(
+                        POST_IMAGES_DIR, file_digest(file), name
+                    )
+            except OSError as error:
+                self.stderr.write(f'{name}: {error}')
+        sources = {}
+        for old_name, new_name in renamed.items():
+            if not storage.exists(new_name):
+                sources.setdefault(new_name, old_name)
+        freed = sum(storage.size(name) for name in renamed) - sum(
+            storage.size(name) for name in sources.values()
+        )
+        if not options['dry_run']:
+            self.move(storage, renamed, sources)
+        self.stdout.write(self.style.SUCCESS(
+            f'Изображений к переносу: {len(renamed)},'
+            f' уникальных: {len(set(renamed.values()))},'
+            f' освобождается байт: {freed}'
+        ))
+
+    def move(self, storage, renamed, sources):
+        for new_name, old_name in sources.items():
+            with storage.open(old_name) as file:
+                storage.save(new_name, file)
+            make_thumbnails(Post(image=new_name).image, overwrite=False)
+        for old_name, new_name in renamed.items():
+            posts = Post.objects.filter(image=old_name)
+            post_ids = list(posts.values_list('id', flat=True))
+            posts.update(image=new_name, thumbnails_image=new_name)
+            for post_id in post_ids:
+                bump_post(post_id)
+            if not image_references(old_name):
+                storage.delete(old_name)
+                delete_thumbnails(old_name, storage)
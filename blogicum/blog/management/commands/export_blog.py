@@ -0,0 +1,58 @@
+import sys
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.export import EXPORTS, FORMATS, export_chunks
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает публикации и комментарии в JSON Lines или CSV,'
+        ' читая таблицы пачками по id'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', '-o', type=Path,
+            help='Файл выгрузки; по умолчанию — стандартный вывод',
+        )
+        parser.add_argument('--format', choices=FORMATS, default='jsonl')
+        parser.add_argument(
+            '--model', choices=tuple(EXPORTS), action='append',
+            help='Выгружаемая модель; по умолчанию все для JSON Lines',
+        )
+        parser.add_argument(
+            '--gzip', action='store_true', help='Сжимать выгрузку gzip',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help='Строк в одном запросе к БД',
+        )
+
+    def handle(self, *args, **options):
+        model_names = options['model'] or list(EXPORTS)
+        if options['format'] == 'csv' and len(model_names) != 1:
+            raise CommandError('Для CSV укажите одну модель в --model')
+        output = options['output']
+        started = time.perf_counter()
+        written = 0
+        file = output.open('wb') if output else sys.stdout.buffer
+        try:
+            for chunk in export_chunks(
+                model_names, options['format'], options['gzip'],
+                options['batch_size'],
+            ):
+                file.write(chunk)
+                written += len(chunk)
+        finally:
+            if output:
+                file.close()
+            else:
+                file.flush()
+        if output:
+            elapsed = time.perf_counter() - started
+            self.stdout.write(self.style.SUCCESS(
+                f'Записано {written} байт в {output} за {elapsed:.1f} с'
+            ))
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from blog.constants import LIMIT_FOR_PAGES
+from blog.images import make_thumbnails, thumbnail_name
+from blog.models import Post
+
+READY_BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт недостающие миниатюры изображений публикаций и считает,'
+        ' сколько байт изображений отдаёт страница ленты до и после'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--overwrite', action='store_true',
+            help='Пересоздать уже существующие миниатюры',
+        )
+        parser.add_argument(
+            '--width', type=int, default=640,
+            help='Ширина миниатюры, которую выбирает браузер для карточки',
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').only('id', 'image')
+        created = 0
+        ready = []
+        for post in posts.iterator():
+            try:
+                created += len(
+                    make_thumbnails(post.image, options['overwrite'])
+                )
+            except (OSError, ValueError) as error:
+                self.stderr.write(f'Пост {post.id}: {error}')
+            else:
+                ready.append(post.id)
+        for start in range(0, len(ready), READY_BATCH_SIZE):
+            Post.objects.filter(
+                id__in=ready[start:start + READY_BATCH_SIZE]
+            ).update(thumbnails_image=F('image'))
+        self.stdout.write(f'Создано миниатюр: {created}')
+        self.report(posts[:LIMIT_FOR_PAGES], options['width'])
+
+    def report(self, posts, width):
+        totals = {'original': 0, 'jpg': 0, 'webp': 0}
+        for post in posts:
+            storage = post.image.storage
+            totals['original'] += storage.size(post.image.name)
+            for extension in ('jpg', 'webp'):
+                name = thumbnail_name(post.image.name, width, extension)
+                if storage.exists(name):
+                    totals[extension] += storage.size(name)
+        original = totals['original'] or 1
+        self.stdout.write(
+            f'Изображения на странице ленты ({LIMIT_FOR_PAGES} постов):'
+        )
+        for label, size in totals.items():
+            self.stdout.write(
+                f'  {label:>8}: {size:>12} байт'
+                f' ({size / original:.0%} от оригинала)'
+            )
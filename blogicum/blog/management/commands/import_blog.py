@@ -0,0 +1,95 @@
+import json
+import time
+from itertools import islice
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.importer import MODELS, Importer, read_records
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует пользователей, категории, местоположения, публикации'
+        ' и комментарии из JSON Lines или CSV пачками bulk_create'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='+', type=Path)
+        parser.add_argument(
+            '--format', choices=('jsonl', 'csv'),
+            help='Формат файлов; по умолчанию — по расширению',
+        )
+        parser.add_argument(
+            '--model', choices=tuple(MODELS),
+            help='Модель записей без поля model, например для CSV',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Записей в одной транзакции',
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать заново, не учитывая сохранённый прогресс',
+        )
+
+    def handle(self, *args, **options):
+        importer = Importer()
+        started = time.perf_counter()
+        total = 0
+        for path in options['files']:
+            if not path.exists():
+                raise CommandError(f'Файл {path} не найден')
+            total += self.import_file(importer, path, options)
+        self.stdout.write('Пересчёт счётчиков...')
+        importer.finish()
+        elapsed = time.perf_counter() - started
+        for name, count in importer.inserted.items():
+            self.stdout.write(f'  {name}: {count}')
+        for name, count in importer.skipped.items():
+            self.stdout.write(self.style.WARNING(
+                f'  пропущено {name}: {count}'
+            ))
+        for error in importer.errors[:10]:
+            self.stderr.write(f'  {error}')
+        for name, fields in importer.ignored_fields.items():
+            self.stdout.write(
+                f'  {name}: пропущены поля {", ".join(sorted(fields))}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Импортировано записей: {total} за {elapsed:.1f} с'
+            f' ({total / max(elapsed, 1e-9):.0f} зап/с)'
+        ))
+
+    def import_file(self, importer, path, options):
+        """Импортировать файл, сохраняя прогресс после каждой транзакции.
+
+        После сбоя повторный запуск пропускает уже записанные пачки.
+        """
+        checkpoint = path.with_name(f'{path.name}.checkpoint')
+        done = 0
+        if checkpoint.exists() and not options['restart']:
+            done = json.loads(checkpoint.read_text())['records']
+            self.stdout.write(f'{path}: продолжение с записи {done}')
+        file_format = options['format'] or (
+            'csv' if path.suffix.lower() == '.csv' else 'jsonl'
+        )
+        started = time.perf_counter()
+        imported = 0
+        with path.open(encoding='utf-8', newline='') as file:
+            records = islice(read_records(file, file_format), done, None)
+            while True:
+                chunk = list(islice(records, options['batch_size']))
+                if not chunk:
+                    break
+                importer.import_chunk(chunk, options['model'])
+                done += len(chunk)
+                imported += len(chunk)
+                checkpoint.write_text(json.dumps({'records': done}))
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'{path}: {done} записей,'
+                    f' {imported / max(elapsed, 1e-9):.0f} зап/с'
+                )
+        checkpoint.unlink(missing_ok=True)
+        return imported
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone as dt
+
+from blog.scheduler import next_scheduled_date, publish_due_posts
+
+
+class Command(BaseCommand):
+    help = (
+        'Выпускает в ленту отложенные публикации, дата которых наступила;'
+        ' с --loop работает постоянно'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Не завершаться, а ждать следующих публикаций',
+        )
+        parser.add_argument(
+            '--max-interval', type=float, default=60.0,
+            help=(
+                'Наибольшая пауза между проверками в секундах; посты,'
+                ' перенесённые на более раннее время, выйдут с этой задержкой'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                published = publish_due_posts()
+                if published:
+                    self.stdout.write(f'Вышло публикаций: {len(published)}')
+                if not options['loop']:
+                    break
+                time.sleep(self.pause(options['max_interval']))
+        except KeyboardInterrupt:
+            self.stdout.write('Остановка планировщика')
+
+    @staticmethod
+    def pause(max_interval):
+        """Спать до ближайшей отложенной публикации, но не дольше предела."""
+        pub_date = next_scheduled_date()
+        if pub_date is None:
+            return max_interval
+        seconds = (pub_date - dt.now()).total_seconds()
+        return min(max(seconds, 0.0), max_interval)
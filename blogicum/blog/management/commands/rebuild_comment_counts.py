@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from blog.counters import rebuild_comment_counts
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает сохранённое количество комментариев у публикаций'
+
+    def handle(self, *args, **options):
+        fixed = rebuild_comment_counts()
+        self.stdout.write(
+            self.style.SUCCESS(f'Исправлено счётчиков: {fixed}')
+        )
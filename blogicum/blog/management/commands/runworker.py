@@ -0,0 +1,60 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from blog import tasks  # noqa: F401
+from blog.queue import claim, run_in_thread
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди в пуле потоков'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=4,
+            help='Число потоков-исполнителей',
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Пауза в секундах, когда очередь пуста',
+        )
+        parser.add_argument(
+            '--visibility-timeout', type=int, default=300,
+            help=(
+                'Через сколько секунд задачу упавшего воркера'
+                ' заберёт другой воркер'
+            ),
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить доступные задачи и завершиться',
+        )
+
+    def handle(self, *args, **options):
+        concurrency = options['concurrency']
+        timeout = timedelta(seconds=options['visibility_timeout'])
+        done = failed = 0
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            try:
+                while True:
+                    jobs = claim(concurrency, timeout)
+                    if not jobs:
+                        if options['once']:
+                            break
+                        time.sleep(options['poll_interval'])
+                        continue
+                    finished, _ = wait(
+                        [pool.submit(run_in_thread, job) for job in jobs]
+                    )
+                    for future in finished:
+                        if future.result():
+                            done += 1
+                        else:
+                            failed += 1
+            except KeyboardInterrupt:
+                self.stdout.write('Остановка воркера')
+        self.stdout.write(
+            self.style.SUCCESS(f'Выполнено: {done}, с ошибкой: {failed}')
+        )
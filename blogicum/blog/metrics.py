@@ -0,0 +1,307 @@
+import json
+import math
+import os
+import threading
+import time
+from contextvars import ContextVar
+from pathlib import Path
+from uuid import uuid4
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+request_queries = ContextVar('request_queries', default=None)
+
+
+class Registry:
+    """Метрики процесса: счётчики и гистограммы с метками.
+
+    Все изменения идут под одной блокировкой, поэтому реестр безопасен
+    для многопоточных воркеров WSGI.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = {}
+        self.samples = {}
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self.register(Counter(self, name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(),
+                  buckets=DURATION_BUCKETS):
+        return self.register(
+            Histogram(self, name, documentation, labels, buckets)
+        )
+
+    def snapshot(self):
+        """Значения метрик в виде, пригодном для JSON и сложения."""
+        with self.lock:
+            return {
+                name: [
+                    [list(labels), list(value)]
+                    for labels, value in self.samples.get(name, {}).items()
+                ]
+                for name in self.metrics
+            }
+
+    def reset(self):
+        with self.lock:
+            self.samples.clear()
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, registry, name, documentation, labels):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+
+    def label_values(self, labels):
+        return tuple(str(labels[label]) for label in self.labels)
+
+    def update(self, labels, change):
+        key = self.label_values(labels)
+        with self.registry.lock:
+            samples = self.registry.samples.setdefault(self.name, {})
+            value = samples.get(key)
+            if value is None:
+                value = samples[key] = self.empty()
+            change(value)
+
+    def empty(self):
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def empty(self):
+        return [0.0]
+
+    def inc(self, amount=1, **labels):
+        def change(value):
+            value[0] += amount
+        self.update(labels, change)
+
+
+class Histogram(Metric):
+    """Гистограмма: счётчики по корзинам, затем сумма и количество."""
+
+    kind = 'histogram'
+
+    def __init__(self, registry, name, documentation, labels, buckets):
+        super().__init__(registry, name, documentation, labels)
+        self.buckets = tuple(buckets)
+
+    def empty(self):
+        return [0.0] * (len(self.buckets) + 2)
+
+    def observe(self, amount, **labels):
+        def change(value):
+            for index, bound in enumerate(self.buckets):
+                if amount <= bound:
+                    value[index] += 1
+            value[-2] += amount
+            value[-1] += 1
+        self.update(labels, change)
+
+
+def merge(snapshots):
+    """Сложить снимки нескольких процессов."""
+    merged = {}
+    for snapshot in snapshots:
+        for name, samples in snapshot.items():
+            totals = merged.setdefault(name, {})
+            for labels, value in samples:
+                key = tuple(labels)
+                if key in totals:
+                    totals[key] = [a + b for a, b in zip(totals[key], value)]
+                else:
+                    totals[key] = list(value)
+    return merged
+
+
+class FileStore:
+    """Снимки метрик процессов в общем каталоге, по файлу на процесс.
+
+    Каждый процесс периодически перезаписывает свой файл целиком, а
+    /metrics складывает файлы всех процессов, в том числе завершённых.
+    Имя файла — pid и случайный суффикс: процесс с повторно выданным pid
+    или форк после создания хранилища не затрёт чужие счётчики.
+    """
+
+    def __init__(self, directory, interval):
+        self.directory = Path(directory)
+        self.interval = interval
+        self.flushed_at = 0
+        self.pid = None
+
+    @property
+    def path(self):
+        if self.pid != os.getpid():
+            self.pid = os.getpid()
+            self.name = f'{self.pid}-{uuid4().hex}.json'
+        return self.directory / self.name
+
+    def flush(self, snapshot):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_suffix('.tmp')
+        temporary.write_text(json.dumps(snapshot))
+        os.replace(temporary, self.path)
+        self.flushed_at = time.monotonic()
+
+    def maybe_flush(self, snapshot_func):
+        if time.monotonic() - self.flushed_at >= self.interval:
+            self.flush(snapshot_func())
+
+    def collect(self):
+        snapshots = []
+        for path in self.directory.glob('*.json'):
+            try:
+                snapshots.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    'blog_http_requests_total',
+    'Запросы по именам маршрутов, методам и кодам ответа.',
+    ('view', 'method', 'status'),
+)
+http_duration = registry.histogram(
+    'blog_http_request_duration_seconds',
+    'Время обработки запроса по именам маршрутов.',
+    ('view',),
+)
+db_queries = registry.counter(
+    'blog_db_queries_total',
+    'SQL-запросы, выполненные при обработке запросов.',
+    ('view',),
+)
+cache_requests = registry.counter(
+    'blog_cache_requests_total',
+    'Обращения к кэшу страниц и карточек постов: hit или miss.',
+    ('cache', 'result'),
+)
+posts_created = registry.counter(
+    'blog_posts_created_total', 'Созданные публикации.'
+)
+comments_created = registry.counter(
+    'blog_comments_created_total', 'Созданные комментарии.'
+)
+
+
+def get_store():
+    if not settings.METRICS_DIR:
+        return None
+    store = getattr(get_store, 'store', None)
+    if store is None or store.directory != Path(settings.METRICS_DIR):
+        store = get_store.store = FileStore(
+            settings.METRICS_DIR, settings.METRICS_FLUSH_INTERVAL
+        )
+    return store
+
+
+def count_query(execute, sql, params, many, context):
+    counter = request_queries.get()
+    if counter is not None:
+        counter[0] += 1
+    return execute(sql, params, many, context)
+
+
+def add_query_counter(connection, **kwargs):
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+def install():
+    connection_created.connect(add_query_counter, dispatch_uid='blog.metrics')
+    for connection in connections.all():
+        add_query_counter(connection)
+
+
+def observe_request(request, response, duration, queries):
+    match = getattr(request, 'resolver_match', None)
+    view = match.view_name if match else 'unresolved'
+    http_requests.inc(
+        view=view, method=request.method, status=response.status_code
+    )
+    http_duration.observe(duration, view=view)
+    db_queries.inc(queries, view=view)
+    store = get_store()
+    if store:
+        store.maybe_flush(registry.snapshot)
+
+
+def collect():
+    """Метрики этого процесса или, при METRICS_DIR, всех процессов."""
+    store = get_store()
+    if not store:
+        return merge([registry.snapshot()])
+    store.flush(registry.snapshot())
+    return merge(store.collect())
+
+
+def escape(value):
+    return (
+        value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    )
+
+
+def format_labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(
+        f'{name}="{escape(value)}"' for name, value in pairs
+    ) + '}'
+
+
+def format_number(value):
+    if math.isinf(value):
+        return '+Inf'
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+def render(samples):
+    """Метрики в текстовом формате Prometheus 0.0.4."""
+    lines = []
+    for name, metric in registry.metrics.items():
+        lines.append(f'# HELP {name} {metric.documentation}')
+        lines.append(f'# TYPE {name} {metric.kind}')
+        for labels, value in sorted(samples.get(name, {}).items()):
+            pairs = list(zip(metric.labels, labels))
+            if metric.kind == 'counter':
+                lines.append(
+                    f'{name}{format_labels(pairs)} {format_number(value[0])}'
+                )
+                continue
+            for bound, count in zip(
+                metric.buckets + (math.inf,), value[:-2] + [value[-1]]
+            ):
+                bucket = format_labels(pairs + [('le', format_number(bound))])
+                lines.append(f'{name}_bucket{bucket} {format_number(count)}')
+            lines.append(
+                f'{name}_sum{format_labels(pairs)} {format_number(value[-2])}'
+            )
+            lines.append(
+                f'{name}_count{format_labels(pairs)}'
+                f' {format_number(value[-1])}'
+            )
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,147 @@
+import random
+import time
+from asyncio import coroutines, iscoroutinefunction
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.deprecation import MiddlewareMixin
+
+from blog import metrics, profiling
+from blog.cache import replicas_may_lag
+from blog.routers import use_replica
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReplicaRoutingMiddleware(MiddlewareMixin):
+    """Направлять чтение в реплики, кроме короткого окна после записи.
+
+    После небезопасного запроса клиент получает cookie, и пока она жива,
+    его запросы читают из основной БД — так он сразу видит свои изменения.
+    Столько же после любой смены версий кэша из основной БД читают все:
+    иначе кэш под новой версией заполнился бы данными отстающей реплики.
+    Флаг сбрасывается значением, а не токеном: под ASGI хуки выполняются
+    в другом потоке, и токен из него нельзя вернуть в контекст запроса.
+    """
+
+    def process_request(self, request):
+        use_replica.set(False)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            getattr(view_func, 'use_replica', False)
+            and request.method in SAFE_METHODS
+            and settings.REPLICA_STICKY_COOKIE not in request.COOKIES
+            and settings.READ_REPLICAS
+            and not replicas_may_lag()
+        ):
+            use_replica.set(True)
+
+    def process_exception(self, request, exception):
+        use_replica.set(False)
+
+    def process_response(self, request, response):
+        use_replica.set(False)
+        if request.method not in SAFE_METHODS:
+            response.set_cookie(
+                settings.REPLICA_STICKY_COOKIE,
+                '1',
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+
+class ProfilingMiddleware:
+    """Замерять запрос по заголовку или случайной выборке.
+
+    Заголовок PROFILING_HEADER со значением `1` включает замеры, а
+    со значением `cprofile` — ещё и cProfile; он действует только для
+    персонала или при DEBUG. Доля PROFILING_SAMPLE_RATE случайных
+    запросов замеряется без cProfile. Итог отдаётся в Server-Timing
+    и пишется в журнал JSONL.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            self._is_coroutine = coroutines._is_coroutine
+        profiling.install()
+
+    def profile_for(self, request):
+        mode = request.headers.get(settings.PROFILING_HEADER)
+        if mode in ('1', 'cprofile') and (
+            settings.DEBUG or request.user.is_staff
+        ):
+            return profiling.RequestProfile(use_cprofile=mode == 'cprofile')
+        if random.random() < settings.PROFILING_SAMPLE_RATE:
+            return profiling.RequestProfile()
+        return None
+
+    def finish(self, request, response, profile):
+        response.headers['Server-Timing'] = profile.server_timing()
+        profiling.write_log(profile.as_dict(request, response))
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        profile = self.profile_for(request)
+        if profile is None:
+            return self.get_response(request)
+        with profile:
+            response = self.get_response(request)
+        return self.finish(request, response, profile)
+
+    async def __acall__(self, request):
+        profile = await sync_to_async(self.profile_for)(request)
+        if profile is None:
+            return await self.get_response(request)
+        with profile:
+            response = await self.get_response(request)
+        return await sync_to_async(self.finish)(request, response, profile)
+
+
+class MetricsMiddleware:
+    """Считать запросы, их длительность и SQL-запросы по именам маршрутов."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            self._is_coroutine = coroutines._is_coroutine
+        metrics.install()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        token = metrics.request_queries.set([0])
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            queries = metrics.request_queries.get()[0]
+            metrics.request_queries.reset(token)
+        metrics.observe_request(
+            request, response, time.perf_counter() - started, queries
+        )
+        return response
+
+    async def __acall__(self, request):
+        token = metrics.request_queries.set([0])
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            queries = metrics.request_queries.get()[0]
+            metrics.request_queries.reset(token)
+        await sync_to_async(metrics.observe_request)(
+            request, response, time.perf_counter() - started, queries
+        )
+        return response
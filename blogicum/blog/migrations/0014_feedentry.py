@@ -0,0 +1,58 @@
+# Generated by Django 3.2.16 on 2026-10-18 20:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_feed_entries(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    FeedEntry = apps.get_model('blog', 'FeedEntry')
+    rows = Post.objects.filter(
+        is_live=True, is_published=True, category__is_published=True
+    ).values_list('id', 'author_id', 'category_id', 'pub_date')
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(
+                kind=kind, owner_id=owner_id, pub_date=pub_date,
+                post_id=post_id,
+            )
+            for post_id, author_id, category_id, pub_date in rows.iterator()
+            for kind, owner_id in (
+                ('category', category_id), ('author', author_id)
+            )
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0013_post_is_live'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('category', 'Категория'), ('author', 'Автор')], max_length=16, verbose_name='Лента')),
+                ('owner_id', models.PositiveIntegerField(verbose_name='id категории или автора')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата и время публикации')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='blog.post', verbose_name='Публикация')),
+            ],
+            options={
+                'verbose_name': 'строка ленты',
+                'verbose_name_plural': 'Строки лент',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['kind', 'owner_id', 'pub_date', 'post'], name='feed_entry_page_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='feedentry',
+            constraint=models.UniqueConstraint(fields=('kind', 'owner_id', 'post'), name='feed_entry_unique'),
+        ),
+        migrations.RunPython(fill_feed_entries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 3.2.16 on 2026-10-18 21:40
+
+from django.db import migrations, models
+
+from blog.counters import install_row_counters, uninstall_row_counters
+
+
+def install(apps, schema_editor):
+    install_row_counters(schema_editor.connection.alias)
+
+
+def uninstall(apps, schema_editor):
+    uninstall_row_counters(schema_editor.connection.alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0014_feedentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RowCount',
+            fields=[
+                ('key', models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name='Ключ')),
+                ('count', models.BigIntegerField(default=0, verbose_name='Число строк')),
+            ],
+            options={
+                'verbose_name': 'счётчик строк',
+                'verbose_name_plural': 'Счётчики строк',
+            },
+        ),
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-18 21:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0015_rowcount'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='thumbnails_image',
+            field=models.CharField(blank=True, editable=False, help_text='Файл, для которого созданы миниатюры srcset.', max_length=100, verbose_name='Изображение с миниатюрами'),
+        ),
+    ]
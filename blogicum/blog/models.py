@@ -1,9 +1,10 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, router, transaction
 from django.urls import reverse
 from django.utils import timezone as dt
 
 from blog.constants import TITLE_LETTER_LIMIT, MAX_LENGTH
+from blog.storage import ContentAddressedStorage, post_image_path
 
 
 User = get_user_model()
@@ -93,13 +94,57 @@ class Post(PublishModel):
         null=True,
         verbose_name='Категория',
     )
-    image = models.ImageField('Фото', upload_to='posts_images', blank=True)
+    image = models.ImageField(
+        'Фото',
+        upload_to=post_image_path,
+        storage=ContentAddressedStorage(),
+        blank=True,
+    )
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False,
+    )
+    updated_at = models.DateTimeField('Изменено', auto_now=True)
+    thumbnails_image = models.CharField(
+        'Изображение с миниатюрами',
+        max_length=100,
+        blank=True,
+        editable=False,
+        help_text='Файл, для которого созданы миниатюры srcset.',
+    )
+    is_live = models.BooleanField(
+        'В ленте',
+        default=False,
+        editable=False,
+        help_text='Дата публикации наступила; ставит publish_scheduled.',
+    )
 
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
         default_related_name = 'posts'
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(
+                fields=('is_published', 'pub_date'),
+                name='post_published_pub_date_idx',
+            ),
+            models.Index(
+                fields=('category', 'pub_date'),
+                name='post_category_pub_date_idx',
+            ),
+            models.Index(
+                fields=('author', 'pub_date'),
+                name='post_author_pub_date_idx',
+            ),
+            models.Index(
+                fields=('pub_date',),
+                name='post_feed_pub_date_idx',
+                condition=models.Q(is_published=True, is_live=True),
+            ),
+            models.Index(fields=('image',), name='post_image_idx'),
+        )
 
     def __str__(self):
         return self.title[:TITLE_LETTER_LIMIT]
@@ -107,6 +152,38 @@ class Post(PublishModel):
     def get_absolute_url(self):
         return reverse('blog:post_detail', kwargs={'post_id': self.id})
 
+    @property
+    def thumbnails_ready(self):
+        """Миниатюры созданы для текущего изображения."""
+        return bool(self.image) and self.thumbnails_image == self.image.name
+
+    def refresh_is_live(self):
+        """Отметить пост вышедшим, если дата публикации наступила."""
+        self.is_live = self.pub_date <= dt.now()
+
+    def save(self, *args, **kwargs):
+        # Счётчик меняется только через F()-выражения, а отметку о
+        # миниатюрах ставит задача, которая их создаёт, поэтому при
+        # обновлении не перезаписываем их устаревшими значениями из памяти.
+        skipped = ('comment_count', 'thumbnails_image')
+        if (
+            self.pk is not None and not self._state.adding
+            and kwargs.get('update_fields') is None
+        ):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in skipped
+            ]
+        super().save(*args, **kwargs)
+
+    def delete(self, using=None, keep_parents=False):
+        # Комментарии удаляются одним запросом, без загрузки и сигналов на
+        # каждый: счётчик и кэш удаляемого поста обновлять незачем.
+        using = using or router.db_for_write(Post, instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            Comment.objects.using(using).filter(post=self)._raw_delete(using)
+            return super().delete(using, keep_parents)
+
 
 class Comment(models.Model):
     """Модель комментария"""
@@ -134,6 +211,111 @@ class Comment(models.Model):
         default_related_name = 'comments'
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at', 'id'),
+                name='comment_post_page_idx',
+            ),
+        )
 
     def __str__(self):
         return self.text[:TITLE_LETTER_LIMIT]
+
+
+class FeedEntry(models.Model):
+    """Строка материализованной ленты категории или автора"""
+
+    CATEGORY = 'category'
+    AUTHOR = 'author'
+    KINDS = (
+        (CATEGORY, 'Категория'),
+        (AUTHOR, 'Автор'),
+    )
+
+    kind = models.CharField('Лента', max_length=16, choices=KINDS)
+    owner_id = models.PositiveIntegerField('id категории или автора')
+    pub_date = models.DateTimeField('Дата и время публикации')
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Публикация',
+    )
+
+    class Meta:
+        verbose_name = 'строка ленты'
+        verbose_name_plural = 'Строки лент'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('kind', 'owner_id', 'post'),
+                name='feed_entry_unique',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('kind', 'owner_id', 'pub_date', 'post'),
+                name='feed_entry_page_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.kind} {self.owner_id}: {self.post_id}'
+
+
+class Job(models.Model):
+    """Модель фоновой задачи"""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField('Задача', max_length=MAX_LENGTH)
+    payload = models.JSONField('Аргументы', default=dict)
+    status = models.CharField(
+        'Статус', max_length=16, choices=STATUSES, default=QUEUED
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveSmallIntegerField(
+        'Максимум попыток', default=3
+    )
+    run_after = models.DateTimeField('Запустить после', default=dt.now)
+    locked_until = models.DateTimeField(
+        'Занята до', null=True, blank=True
+    )
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created_at = models.DateTimeField('Создана', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        ordering = ('run_after', 'id')
+        indexes = (
+            models.Index(
+                fields=('status', 'run_after'),
+                name='job_status_run_after_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
+
+
+class RowCount(models.Model):
+    """Число строк таблицы или ленты, которое ведут триггеры SQLite"""
+
+    key = models.CharField('Ключ', max_length=64, primary_key=True)
+    count = models.BigIntegerField('Число строк', default=0)
+
+    class Meta:
+        verbose_name = 'счётчик строк'
+        verbose_name_plural = 'Счётчики строк'
+
+    def __str__(self):
+        return f'{self.key}: {self.count}'
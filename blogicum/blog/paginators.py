@@ -0,0 +1,234 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.core.exceptions import EmptyResultSet, ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+
+from blog.constants import EXACT_COUNT_THRESHOLD
+
+# Порядок лент постов; последнее поле уникально.
+POST_ORDERING = ('-pub_date', '-id')
+
+
+class CursorPage:
+    """Страница курсорной пагинации"""
+
+    paginator = None
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Пагинация по ключу без COUNT(*) и OFFSET.
+
+    `ordering` задаёт поля ключа в порядке ленты, например
+    ('-pub_date', '-id'); последнее поле должно быть уникальным.
+    """
+
+    def __init__(self, queryset, per_page, ordering=POST_ORDERING):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = tuple(ordering)
+
+    @staticmethod
+    def _field(order):
+        return order.lstrip('-')
+
+    def _reversed_ordering(self):
+        return tuple(
+            self._field(order) if order.startswith('-') else f'-{order}'
+            for order in self.ordering
+        )
+
+    def _keyset_filter(self, values, ordering):
+        condition = Q()
+        equal = Q()
+        for order, value in zip(ordering, values):
+            field = self._field(order)
+            lookup = 'lt' if order.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{field}__{lookup}': value})
+            equal &= Q(**{field: value})
+        return condition
+
+    def _model_field(self, name):
+        """Поле модели или аннотации выборки, по которому идёт порядок."""
+        annotation = self.queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        if name == 'pk':
+            return self.queryset.model._meta.pk
+        return self.queryset.model._meta.get_field(name)
+
+    def _key(self, obj):
+        return [getattr(obj, self._field(order)) for order in self.ordering]
+
+    def encode_cursor(self, obj, direction):
+        values = [
+            {'dt': value.isoformat()} if isinstance(value, datetime)
+            else value
+            for value in self._key(obj)
+        ]
+        raw = json.dumps([direction, values], separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            direction, values = json.loads(base64.urlsafe_b64decode(padded))
+            if direction not in ('next', 'prev') or (
+                len(values) != len(self.ordering)
+            ):
+                return None, None
+            values = [
+                self._model_field(self._field(order)).to_python(
+                    datetime.fromisoformat(value['dt'])
+                    if isinstance(value, dict) else value
+                )
+                for order, value in zip(self.ordering, values)
+            ]
+        except (ValueError, TypeError, KeyError, binascii.Error,
+                ValidationError):
+            return None, None
+        if None in values:
+            return None, None
+        return direction, values
+
+    def get_page(self, cursor):
+        """Вернуть страницу после (или до) позиции, закодированной в курсоре.
+
+        Некорректный или пустой курсор означает первую страницу.
+        """
+        direction, values = self.decode_cursor(cursor or '')
+        if direction == 'prev':
+            ordering = self._reversed_ordering()
+            items = list(
+                self.queryset.filter(self._keyset_filter(values, ordering))
+                .order_by(*ordering)[:self.per_page + 1]
+            )
+            has_more = len(items) > self.per_page
+            items = items[:self.per_page][::-1]
+            has_previous, has_next = has_more, True
+        else:
+            queryset = self.queryset.order_by(*self.ordering)
+            if direction == 'next':
+                queryset = queryset.filter(
+                    self._keyset_filter(values, self.ordering)
+                )
+            items = list(queryset[:self.per_page + 1])
+            has_next = len(items) > self.per_page
+            items = items[:self.per_page]
+            has_previous = direction == 'next'
+        if not items:
+            return CursorPage(items)
+        return CursorPage(
+            items,
+            next_cursor=(
+                self.encode_cursor(items[-1], 'next') if has_next else None
+            ),
+            previous_cursor=(
+                self.encode_cursor(items[0], 'prev') if has_previous else None
+            ),
+        )
+
+
+def stored_count(queryset, key):
+    """Число строк из счётчика `key` или точный COUNT(*) ниже порога.
+
+    Обе ветви — один запрос: SQLite выполняет подзапрос COUNT(*) только
+    тогда, когда до него доходит CASE. Возвращает (число, оценка ли это).
+    """
+    queryset = queryset.order_by().values('pk')
+    try:
+        sql, params = queryset.query.get_compiler(queryset.db).as_sql()
+    except EmptyResultSet:
+        return 0, False
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(
+            'SELECT CASE WHEN stored >= %s THEN stored'
+            f' ELSE (SELECT COUNT(*) FROM ({sql}) counted) END,'
+            ' stored >= %s'
+            ' FROM (SELECT COALESCE((SELECT count FROM blog_rowcount'
+            ' WHERE key = %s), 0) AS stored) counter',
+            [EXACT_COUNT_THRESHOLD, *params, EXACT_COUNT_THRESHOLD, key],
+        )
+        count, estimated = cursor.fetchone()
+    return count, bool(estimated)
+
+
+def planner_estimate(queryset):
+    """Оценка числа строк выборки по плану PostgreSQL."""
+    try:
+        sql, params = queryset.order_by().query.get_compiler(
+            queryset.db
+        ).as_sql()
+    except EmptyResultSet:
+        return 0
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор, оценивающий размер большой выборки без COUNT(*).
+
+    В PostgreSQL оценка берётся из плана запроса, в SQLite — из таблицы
+    blog_rowcount по ключу `count_key` (для выборки без фильтров — по
+    имени таблицы). Ниже EXACT_COUNT_THRESHOLD число строк точное.
+    `estimated` сообщает шаблону, что число страниц приблизительное.
+    """
+
+    def __init__(self, object_list, per_page, orphans=0,
+                 allow_empty_first_page=True, count_key=None):
+        super().__init__(object_list, per_page, orphans,
+                         allow_empty_first_page)
+        self.count_key = count_key
+        self.estimated = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet):
+            return super().count
+        vendor = connections[queryset.db].vendor
+        if vendor == 'sqlite':
+            key = self.count_key
+            if key is None and not queryset.query.where:
+                key = queryset.model._meta.db_table
+            if key is not None:
+                count, self.estimated = stored_count(queryset, key)
+                return count
+        elif vendor == 'postgresql':
+            estimate = planner_estimate(queryset)
+            if estimate >= EXACT_COUNT_THRESHOLD:
+                self.estimated = True
+                return estimate
+        return super().count
@@ -0,0 +1,191 @@
+import cProfile
+import heapq
+import io
+import json
+import logging
+import pstats
+import re
+from collections import defaultdict
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.base import Template
+from django.utils import timezone as dt
+
+current_profile = ContextVar('current_profile', default=None)
+
+logger = logging.getLogger('blog.profiling')
+
+# Сколько функций cProfile попадает в журнал.
+CPROFILE_TOP = 25
+SQL_TEXT_LIMIT = 500
+
+_render = Template.render
+
+
+class RequestProfile:
+    """Замеры одного запроса: SQL, шаблоны и, по желанию, cProfile."""
+
+    def __init__(self, use_cprofile=False):
+        self.queries = []
+        self.templates = defaultdict(lambda: [0.0, 0])
+        self.profiler = cProfile.Profile() if use_cprofile else None
+        self.started = None
+        self.total = None
+
+    def __enter__(self):
+        self.token = current_profile.set(self)
+        self.started = perf_counter()
+        if self.profiler:
+            self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.profiler:
+            self.profiler.disable()
+        self.total = perf_counter() - self.started
+        current_profile.reset(self.token)
+
+    def record_query(self, sql, duration):
+        self.queries.append((duration, sql))
+
+    def record_template(self, name, duration):
+        timing = self.templates[name]
+        timing[0] += duration
+        timing[1] += 1
+
+    @property
+    def sql_time(self):
+        return sum(duration for duration, _ in self.queries)
+
+    def slowest_queries(self):
+        return [
+            {'ms': round(duration * 1000, 3), 'sql': sql[:SQL_TEXT_LIMIT]}
+            for duration, sql in heapq.nlargest(
+                settings.PROFILING_SLOW_QUERIES, self.queries,
+                key=lambda query: query[0],
+            )
+        ]
+
+    def cprofile_stats(self):
+        if not self.profiler:
+            return None
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=stream)
+        stats.sort_stats('cumulative').print_stats(CPROFILE_TOP)
+        return stream.getvalue().splitlines()
+
+    def server_timing(self):
+        """Значение заголовка Server-Timing, длительности в миллисекундах.
+
+        Время шаблонов указано включительно: в шаблон страницы входит
+        время всех подключённых в нём шаблонов.
+        """
+        metrics = [
+            f'total;dur={self.total * 1000:.1f}',
+            f'sql;dur={self.sql_time * 1000:.1f}'
+            f';desc="{len(self.queries)} queries"',
+        ]
+        for name, (duration, count) in sorted(
+            self.templates.items(), key=lambda item: -item[1][0]
+        ):
+            metric = re.sub(r'[^\w.-]', '_', name)
+            metrics.append(
+                f'tpl.{metric};dur={duration * 1000:.1f};desc="x{count}"'
+            )
+        return ', '.join(metrics)
+
+    def as_dict(self, request, response):
+        return {
+            'time': dt.now().isoformat(),
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'total_ms': round(self.total * 1000, 3),
+            'sql': {
+                'count': len(self.queries),
+                'ms': round(self.sql_time * 1000, 3),
+                'slowest': self.slowest_queries(),
+            },
+            'templates': {
+                name: {'ms': round(duration * 1000, 3), 'count': count}
+                for name, (duration, count) in self.templates.items()
+            },
+            'cprofile': self.cprofile_stats(),
+        }
+
+
+def sql_timer(execute, sql, params, many, context):
+    profile = current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.record_query(sql, perf_counter() - started)
+
+
+def timed_render(self, context):
+    profile = current_profile.get()
+    if profile is None:
+        return _render(self, context)
+    started = perf_counter()
+    try:
+        return _render(self, context)
+    finally:
+        profile.record_template(
+            self.origin.template_name or self.origin.name,
+            perf_counter() - started,
+        )
+
+
+def add_sql_timer(connection, **kwargs):
+    if sql_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(sql_timer)
+
+
+def install():
+    """Подключить замеры ко всем соединениям с БД и к рендерингу шаблонов.
+
+    Без активного профиля обёртки сразу вызывают исходный код.
+    """
+    connection_created.connect(add_sql_timer, dispatch_uid='blog.profiling')
+    for connection in connections.all():
+        add_sql_timer(connection)
+    Template.render = timed_render
+
+
+def configure_log():
+    """Направить журнал в PROFILING_LOG_FILE, если он ещё не настроен."""
+    path = Path(settings.PROFILING_LOG_FILE).resolve()
+    if any(
+        getattr(handler, 'baseFilename', None) == str(path)
+        for handler in logger.handlers
+    ):
+        return
+    for handler in logger.handlers[:]:
+        logger.removeHandler(handler)
+        handler.close()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    handler = RotatingFileHandler(
+        path,
+        maxBytes=settings.PROFILING_LOG_MAX_BYTES,
+        backupCount=settings.PROFILING_LOG_BACKUPS,
+        encoding='utf-8',
+    )
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def write_log(entry):
+    """Дописать замер строкой JSON в ротируемый журнал."""
+    configure_log()
+    logger.info(json.dumps(entry, ensure_ascii=False, default=str))
@@ -0,0 +1,123 @@
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import F, Q
+from django.utils import timezone as dt
+
+from blog.models import Job
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+def task(func):
+    """Зарегистрировать функцию как фоновую задачу.
+
+    Аргументы задачи передаются только по имени и должны сериализоваться
+    в JSON; `func.delay(**kwargs)` ставит задачу в очередь.
+    """
+    name = f'{func.__module__}.{func.__name__}'
+    registry[name] = func
+    func.delay = lambda **payload: enqueue(name, **payload)
+    return func
+
+
+def enqueue(name, **payload):
+    """Поставить задачу в очередь в текущей транзакции.
+
+    В режиме BLOG_TASKS_EAGER задача сразу выполняется в этом же потоке.
+    """
+    job = Job.objects.create(name=name, payload=payload)
+    if settings.BLOG_TASKS_EAGER:
+        job.status = Job.RUNNING
+        job.attempts = 1
+        run_job(job)
+    return job
+
+
+def available(now):
+    """Задачи, готовые к запуску, и задачи с истёкшей арендой.
+
+    Задачу с истёкшей арендой и исчерпанными попытками повторно не берут.
+    """
+    return Q(status=Job.QUEUED, run_after__lte=now) | Q(
+        status=Job.RUNNING, locked_until__lt=now,
+        attempts__lt=F('max_attempts'),
+    )
+
+
+def fail_abandoned(now):
+    """Пометить упавшими задачи, чей воркер пропал на последней попытке."""
+    return Job.objects.filter(
+        status=Job.RUNNING, locked_until__lt=now,
+        attempts__gte=F('max_attempts'),
+    ).update(
+        status=Job.FAILED,
+        locked_until=None,
+        last_error='Аренда истекла на последней попытке',
+    )
+
+
+def claim(limit, visibility_timeout):
+    """Забрать до `limit` задач, продлив их аренду на `visibility_timeout`.
+
+    Захват — условный UPDATE по одной строке, поэтому задачу получает
+    ровно один воркер без блокировок SELECT ... FOR UPDATE.
+    """
+    now = dt.now()
+    fail_abandoned(now)
+    candidates = Job.objects.filter(available(now)).values_list(
+        'id', flat=True
+    )[:limit]
+    claimed = []
+    for job_id in candidates:
+        updated = Job.objects.filter(available(now), id=job_id).update(
+            status=Job.RUNNING,
+            locked_until=now + visibility_timeout,
+            attempts=F('attempts') + 1,
+        )
+        if updated:
+            claimed.append(Job.objects.get(id=job_id))
+    return claimed
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=settings.BLOG_TASKS_RETRY_DELAY * 2 ** attempts)
+
+
+def run_job(job):
+    """Выполнить задачу и сохранить результат; вернуть True при успехе."""
+    func = registry.get(job.name)
+    try:
+        if func is None:
+            raise LookupError(f'Неизвестная задача {job.name}')
+        func(**job.payload)
+    except Exception:
+        logger.exception('Задача %s завершилась ошибкой', job)
+        job.last_error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            job.status = Job.FAILED
+        else:
+            job.status = Job.QUEUED
+            job.run_after = dt.now() + retry_delay(job.attempts)
+        job.locked_until = None
+        job.save(update_fields=(
+            'status', 'run_after', 'locked_until', 'last_error', 'attempts'
+        ))
+        return False
+    job.status = Job.DONE
+    job.locked_until = None
+    job.save(update_fields=('status', 'locked_until', 'attempts'))
+    return True
+
+
+def run_in_thread(job):
+    """Выполнить задачу в потоке пула и закрыть его соединения с БД."""
+    try:
+        return run_job(job)
+    finally:
+        connections.close_all()
@@ -0,0 +1,30 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+use_replica = ContextVar('use_replica', default=False)
+
+
+def read_replica(view):
+    """Пометить представление как только читающее данные."""
+    view.use_replica = True
+    return view
+
+
+class ReplicaRouter:
+    """Чтение из реплик для помеченных представлений, запись в основную БД."""
+
+    def db_for_read(self, model, **hints):
+        if use_replica.get() and settings.READ_REPLICAS:
+            return random.choice(settings.READ_REPLICAS)
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.READ_REPLICAS
@@ -0,0 +1,54 @@
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils import timezone as dt
+
+from blog.feeds import refresh_feeds
+from blog.models import Post
+
+# Отправляется после того, как посты вышли в ленту; аргумент post_ids.
+post_went_live = Signal()
+
+PUBLISH_BATCH_SIZE = 500
+
+
+def due_posts(now):
+    return Post.objects.filter(is_live=False, pub_date__lte=now)
+
+
+def publish_due_posts(now=None):
+    """Отметить вышедшими посты с наступившей датой публикации.
+
+    Лента фильтрует посты по is_live, а не по pub_date <= now(), поэтому
+    отложенный пост появляется в ней только после этого вызова.
+    Возвращает id вышедших постов.
+    """
+    now = now or dt.now()
+    published = []
+    while True:
+        with transaction.atomic():
+            post_ids = list(due_posts(now).order_by('pub_date').values_list(
+                'id', flat=True
+            )[:PUBLISH_BATCH_SIZE])
+            # Повторная проверка условия: дату могли перенести в будущее.
+            due_posts(now).filter(id__in=post_ids).update(is_live=True)
+            went_live = list(Post.objects.filter(
+                id__in=post_ids, is_live=True
+            ).values_list('id', flat=True))
+            refresh_feeds(Post.objects.filter(id__in=went_live))
+        if not post_ids:
+            break
+        if not went_live:
+            continue
+        published += went_live
+        transaction.on_commit(lambda ids=went_live: post_went_live.send(
+            sender=Post, post_ids=ids
+        ))
+    return published
+
+
+def next_scheduled_date():
+    """Ближайшая дата публикации ещё не вышедшего поста или None."""
+    post = Post.objects.filter(is_live=False).order_by('pub_date').only(
+        'pub_date'
+    ).first()
+    return post.pub_date if post else None
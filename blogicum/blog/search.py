@@ -0,0 +1,144 @@
+import re
+
+from django.db import connections
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+SQLITE_INSTALL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS blog_post_fts USING fts5("
+    " title, text, content='blog_post', content_rowid='id',"
+    " tokenize='unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS blog_post_fts_ai AFTER INSERT ON blog_post"
+    " BEGIN"
+    " INSERT INTO blog_post_fts(rowid, title, text)"
+    " VALUES (new.id, new.title, new.text);"
+    " END",
+    "CREATE TRIGGER IF NOT EXISTS blog_post_fts_ad AFTER DELETE ON blog_post"
+    " BEGIN"
+    " INSERT INTO blog_post_fts(blog_post_fts, rowid, title, text)"
+    " VALUES ('delete', old.id, old.title, old.text);"
+    " END",
+    "CREATE TRIGGER IF NOT EXISTS blog_post_fts_au"
+    " AFTER UPDATE OF title, text ON blog_post"
+    " BEGIN"
+    " INSERT INTO blog_post_fts(blog_post_fts, rowid, title, text)"
+    " VALUES ('delete', old.id, old.title, old.text);"
+    " INSERT INTO blog_post_fts(rowid, title, text)"
+    " VALUES (new.id, new.title, new.text);"
+    " END",
+)
+SQLITE_TRIGGERS = ('blog_post_fts_ai', 'blog_post_fts_ad', 'blog_post_fts_au')
+SQLITE_REBUILD = "INSERT INTO blog_post_fts(blog_post_fts) VALUES ('rebuild')"
+SQLITE_UNINSTALL = (
+    *(f'DROP TRIGGER IF EXISTS {name}' for name in SQLITE_TRIGGERS),
+    'DROP TABLE IF EXISTS blog_post_fts',
+)
+
+POSTGRES_INSTALL = (
+    "ALTER TABLE blog_post ADD COLUMN IF NOT EXISTS search_vector tsvector"
+    " GENERATED ALWAYS AS ("
+    " setweight(to_tsvector('russian', coalesce(title, '')), 'A') ||"
+    " setweight(to_tsvector('russian', coalesce(text, '')), 'B')"
+    ") STORED",
+    "CREATE INDEX IF NOT EXISTS blog_post_search_idx"
+    " ON blog_post USING GIN (search_vector)",
+)
+POSTGRES_UNINSTALL = (
+    'DROP INDEX IF EXISTS blog_post_search_idx',
+    'ALTER TABLE blog_post DROP COLUMN IF EXISTS search_vector',
+)
+
+# Веса заголовка и текста для bm25 в FTS5.
+SQLITE_RANK = 'bm25(blog_post_fts, 10.0, 1.0)'
+
+
+def install_search_index(using='default'):
+    """Создать полнотекстовый индекс постов, если его ещё нет.
+
+    Если триггеры SQLite пришлось создавать заново, индекс перестраивается.
+    """
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                "SELECT count(*) FROM sqlite_master WHERE type = 'trigger'"
+                " AND name IN (%s, %s, %s)", SQLITE_TRIGGERS
+            )
+            triggers_missing = cursor.fetchone()[0] < len(SQLITE_TRIGGERS)
+            for sql in SQLITE_INSTALL:
+                cursor.execute(sql)
+            if triggers_missing:
+                cursor.execute(SQLITE_REBUILD)
+        elif connection.vendor == 'postgresql':
+            for sql in POSTGRES_INSTALL:
+                cursor.execute(sql)
+
+
+def repair_search_index(using='default'):
+    """Восстановить триггеры SQLite, если индекс уже был установлен.
+
+    Миграции, пересоздающие таблицу blog_post, удаляют её триггеры,
+    поэтому проверка выполняется после каждого migrate.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    if 'blog_post_fts' in connection.introspection.table_names():
+        install_search_index(using)
+
+
+def uninstall_search_index(using='default'):
+    connection = connections[using]
+    statements = {
+        'sqlite': SQLITE_UNINSTALL,
+        'postgresql': POSTGRES_UNINSTALL,
+    }.get(connection.vendor, ())
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def fts5_query(query):
+    """Безопасный запрос FTS5: все слова по префиксу, без операторов."""
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', query))
+
+
+def search_posts(posts, query):
+    """Отфильтровать посты по запросу и добавить релевантность `score`.
+
+    Чем больше `score`, тем выше пост в выдаче.
+    """
+    vendor = connections[posts.db].vendor
+    if vendor == 'sqlite':
+        match = fts5_query(query)
+        if not match:
+            return posts.none()
+        return posts.filter(id__in=RawSQL(
+            'SELECT rowid FROM blog_post_fts WHERE blog_post_fts MATCH %s',
+            (match,),
+        )).annotate(score=RawSQL(
+            f'SELECT -{SQLITE_RANK} FROM blog_post_fts'
+            ' WHERE blog_post_fts MATCH %s'
+            ' AND blog_post_fts.rowid = blog_post.id',
+            (match,),
+            output_field=FloatField(),
+        ))
+    if vendor == 'postgresql':
+        tsquery = "websearch_to_tsquery('russian', %s)"
+        return posts.extra(
+            where=[f'blog_post.search_vector @@ {tsquery}'],
+            params=(query,),
+        ).annotate(score=RawSQL(
+            f'ts_rank(blog_post.search_vector, {tsquery})',
+            (query,),
+            output_field=FloatField(),
+        ))
+    words = re.findall(r'\w+', query)
+    if not words:
+        return posts.none()
+    condition = Q()
+    for word in words:
+        condition &= Q(title__icontains=word) | Q(text__icontains=word)
+    return posts.filter(condition).annotate(
+        score=RawSQL('0', (), output_field=FloatField())
+    )
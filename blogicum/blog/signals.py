@@ -0,0 +1,199 @@
+from contextvars import ContextVar
+from functools import partial
+
+from django.db.models.signals import (post_delete, post_init, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+from django.utils import timezone as dt
+
+from blog import metrics
+from blog.cache import bump_lookups, bump_post, bump_posts, bump_shared
+from blog.counters import change_comment_count, repair_row_counters
+from blog.feeds import UNKNOWN, feed_state, refresh_feeds, sync_post
+from blog.models import Category, Comment, FeedEntry, Location, Post, User
+from blog.scheduler import post_went_live
+from blog.search import repair_search_index
+from blog.storage import keep_image, release_image
+from blog.tasks import process_post_image
+
+# Посты, удаляемые сейчас вместе с их комментариями.
+deleting_posts = ContextVar('deleting_posts', default=frozenset())
+
+
+@receiver(post_init, sender=Comment)
+def comment_loaded(sender, instance, **kwargs):
+    instance._stored_post_id = instance.__dict__.get('post_id')
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    # В фикстуре счётчики постов уже сохранены.
+    previous = None if created or raw else instance._stored_post_id
+    if created and not raw:
+        change_comment_count(instance.post_id, 1)
+        metrics.comments_created.inc()
+    elif previous is not None and previous != instance.post_id:
+        # Комментарий перенесён к другому посту, например в админке.
+        change_comment_count(previous, -1)
+        change_comment_count(instance.post_id, 1)
+        bump_post(previous)
+    instance._stored_post_id = instance.post_id
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    # При каскадном удалении поста его счётчик и версия уже не нужны.
+    if instance.post_id not in deleting_posts.get():
+        change_comment_count(instance.post_id, -1)
+        bump_post(instance.post_id)
+
+
+@receiver(post_save, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    bump_post(instance.post_id)
+
+
+@receiver(pre_delete, sender=Post)
+def post_deleting(sender, instance, **kwargs):
+    deleting_posts.set(deleting_posts.get() | {instance.pk})
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_changed(sender, instance, **kwargs):
+    bump_post(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    deleting_posts.set(deleting_posts.get() - {instance.pk})
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        metrics.posts_created.inc()
+
+
+@receiver(post_save, sender=Post)
+def post_feeds_changed(sender, instance, created, **kwargs):
+    sync_post(instance, created)
+
+
+@receiver(post_init, sender=Category)
+def category_loaded(sender, instance, **kwargs):
+    # Отложенное поле не загружаем: тогда ленты обновятся при сохранении.
+    instance._stored_is_published = instance.__dict__.get(
+        'is_published', UNKNOWN
+    )
+
+
+@receiver(post_save, sender=Category)
+def category_feed_changed(sender, instance, created, **kwargs):
+    # Строки лент зависят только от публикации категории.
+    if not created and instance._stored_is_published != instance.is_published:
+        refresh_feeds(Post.objects.filter(category=instance))
+    instance._stored_is_published = instance.is_published
+
+
+@receiver(post_delete, sender=Category)
+def category_feed_deleted(sender, instance, **kwargs):
+    # Посты уже без категории, ищем их по строкам её ленты.
+    refresh_feeds(Post.objects.filter(
+        feed_entries__kind=FeedEntry.CATEGORY,
+        feed_entries__owner_id=instance.id,
+    ))
+
+
+@receiver(pre_save, sender=Post)
+def post_scheduled(sender, instance, **kwargs):
+    instance.refresh_is_live()
+
+
+@receiver(post_went_live)
+def posts_went_live(sender, post_ids, **kwargs):
+    bump_posts(post_ids)
+
+
+@receiver(pre_save, sender=Post)
+def post_loaded_from_fixture(sender, instance, raw, **kwargs):
+    # loaddata сохраняет поля как есть, без auto_now.
+    if raw and instance.updated_at is None:
+        instance.updated_at = instance.created_at or dt.now()
+
+
+@receiver(pre_save, sender=Post)
+def post_image_uploaded(sender, instance, **kwargs):
+    # Содержимое загрузки нужно и после сохранения, см. keep_image.
+    image = instance.image
+    instance._uploaded_image = (
+        image if image and not image._committed else None
+    )
+
+
+@receiver(post_save, sender=Post)
+def post_image_saved(sender, instance, **kwargs):
+    image = getattr(instance, '_uploaded_image', None)
+    if image is not None:
+        instance._uploaded_image = None
+        process_post_image.delay(post_id=instance.pk)
+        keep_image(image, partial(image_restored, instance.pk, image.name))
+
+
+def image_restored(post_id, name):
+    # Миниатюры удалены вместе с файлом: создаём их заново.
+    Post.objects.filter(id=post_id, image=name).update(thumbnails_image='')
+    bump_post(post_id)
+    process_post_image.delay(post_id=post_id)
+
+
+def stored_image_name(instance):
+    # Читаем значение напрямую, чтобы не загружать отложенное поле.
+    image = instance.__dict__.get('image')
+    if getattr(image, '_committed', True):
+        return getattr(image, 'name', image)
+    return None
+
+
+@receiver(post_init, sender=Post)
+def post_image_loaded(sender, instance, **kwargs):
+    # Из базы приходит строка; файл, переданный в конструктор, ещё не сохранён.
+    image = instance.__dict__.get('image')
+    instance._stored_image = image if isinstance(image, str) else None
+    instance._feed_state = feed_state(instance)
+
+
+@receiver(post_save, sender=Post)
+def post_image_replaced(sender, instance, **kwargs):
+    previous = instance._stored_image
+    current = stored_image_name(instance)
+    if previous and previous != current:
+        release_image(previous, instance.image.storage)
+    instance._stored_image = current
+
+
+@receiver(post_delete, sender=Post)
+def post_image_released(sender, instance, **kwargs):
+    release_image(stored_image_name(instance), instance.image.storage)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def lookup_changed(sender, instance, **kwargs):
+    bump_lookups()
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'username' in update_fields:
+        bump_shared()
+
+
+def restore_search_index(sender, using, **kwargs):
+    repair_search_index(using)
+
+
+def restore_row_counters(sender, using, **kwargs):
+    repair_row_counters(using)
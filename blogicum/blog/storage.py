@@ -0,0 +1,120 @@
+import hashlib
+import os
+from contextlib import contextmanager
+
+from django.core.files import locks
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.utils.deconstruct import deconstructible
+
+from blog.images import delete_thumbnails
+
+POST_IMAGES_DIR = 'posts_images'
+REFERENCES_LOCK = '.image_references.lock'
+
+
+def file_digest(file):
+    """SHA-256 содержимого файла, прочитанного по частям."""
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def hashed_name(directory, digest, filename):
+    _, extension = os.path.splitext(filename)
+    return os.path.join(
+        directory, digest[:2], f'{digest}{extension.lower()}'
+    )
+
+
+def post_image_path(instance, filename):
+    """Путь изображения поста по хешу его содержимого.
+
+    Одинаковые загрузки получают одно имя и хранятся одним файлом.
+    """
+    return hashed_name(
+        POST_IMAGES_DIR, file_digest(instance.image.file), filename
+    )
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, в котором имя файла определяется его содержимым.
+
+    Файл с таким именем уже содержит те же байты, поэтому повторная
+    загрузка не записывается и не получает суффикс.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        if self.exists(name):
+            return name
+        return super()._save(name, content)
+
+    def restore(self, name, content):
+        """Записать файл заново, если его удалили; вернуть True, если так."""
+        with references_lock(self):
+            if self.exists(name):
+                return False
+            content.seek(0)
+            super()._save(name, content)
+        return True
+
+
+@contextmanager
+def references_lock(storage):
+    """Межпроцессная блокировка проверки ссылок на файлы хранилища."""
+    os.makedirs(storage.location, exist_ok=True)
+    with open(os.path.join(storage.location, REFERENCES_LOCK), 'a') as file:
+        locks.lock(file, locks.LOCK_EX)
+        try:
+            yield
+        finally:
+            locks.unlock(file)
+
+
+def image_references(name):
+    from blog.models import Post
+
+    return Post.objects.filter(image=name).count()
+
+
+def release_image(name, storage):
+    """Удалить файл и его миниатюры после коммита, если на него не ссылаются.
+
+    Счётчик ссылок — число постов с этим именем изображения. Загрузка
+    того же файла, ещё не закоммиченная, в нём не видна, поэтому после
+    своего коммита она проверяет файл через keep_image под той же
+    блокировкой.
+    """
+    if not name:
+        return
+
+    def delete_unreferenced():
+        with references_lock(storage):
+            if not image_references(name):
+                storage.delete(name)
+                delete_thumbnails(name, storage)
+
+    transaction.on_commit(delete_unreferenced)
+
+
+def keep_image(image, restored):
+    """После коммита вернуть файл загрузки, если его успели удалить.
+
+    Повторная загрузка существующего файла ничего не записывает. Если
+    последний пост с этим файлом удалялся одновременно, файл мог
+    исчезнуть до коммита загрузки; тогда он записывается снова из её
+    содержимого и вызывается `restored`.
+    """
+    name, storage, content = image.name, image.storage, image.file
+
+    def restore():
+        if storage.restore(name, content):
+            restored()
+
+    transaction.on_commit(restore)
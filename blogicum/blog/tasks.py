@@ -0,0 +1,21 @@
+from django.db.models import F
+
+from blog.cache import bump_post
+from blog.images import make_thumbnails
+from blog.models import Post
+from blog.queue import task
+
+
+@task
+def process_post_image(post_id):
+    """Создать миниатюры загруженного изображения поста."""
+    post = Post.objects.filter(id=post_id).only('id', 'image').first()
+    if post is not None and post.image:
+        # Имена миниатюр зависят от содержимого, готовые не пересоздаём.
+        make_thumbnails(post.image, overwrite=False)
+        marked = Post.objects.filter(
+            id=post_id, image=post.image.name
+        ).update(thumbnails_image=F('image'))
+        if marked:
+            # Карточки и страницы в кэше собраны без srcset.
+            bump_post(post_id)
@@ -0,0 +1,39 @@
+from django import template
+from django.core.cache import cache
+from django.utils.safestring import mark_safe
+
+from blog import metrics
+from blog.cache import post_card_key
+from blog.constants import POST_CARD_TIMEOUT
+from blog.images import srcset
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def post_card(context, post):
+    """Карточка поста из кэша фрагментов."""
+    key = post_card_key(post, context.get('user'))
+    html = cache.get(key)
+    metrics.cache_requests.inc(
+        cache='post_card', result='miss' if html is None else 'hit'
+    )
+    if html is None:
+        card = context.template.engine.get_template('includes/post_card.html')
+        html = card.render(
+            template.Context({'post': post}, autoescape=context.autoescape)
+        )
+        cache.set(key, html, POST_CARD_TIMEOUT)
+    return mark_safe(html)
+
+
+@register.simple_tag
+def image_srcset(image_field, extension):
+    """Значение srcset с миниатюрами изображения."""
+    return srcset(image_field, extension)
+
+
+@register.filter
+def page_links(page_obj):
+    """Номера страниц вокруг текущей и по краям, пропуски — многоточием."""
+    return page_obj.paginator.get_elided_page_range(page_obj.number)
@@ -1,6 +1,9 @@
+from django.conf import settings
 from django.urls import include, path
 
-from . import views
+from . import async_views, views
+
+read_views = async_views if settings.BLOG_ASYNC_VIEWS else views
 
 app_name = 'blog'
 
@@ -20,24 +23,31 @@ posts_urls = [
         views.add_comment,
         name='add_comment',
     ),
+    path(
+        '<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments',
+    ),
     path('<int:post_id>/edit/', views.edit_post, name='edit_post'),
     path('<int:post_id>/delete/', views.delete_post, name='delete_post'),
-    path('<int:post_id>/', views.post_detail, name='post_detail'),
+    path('<int:post_id>/', read_views.post_detail, name='post_detail'),
     path('create/', views.create_post, name='create_post')
 ]
 
 profile_urls = [
     path('edit/', views.edit_profile, name='edit_profile',),
-    path('<slug:username>/', views.profile, name='profile'),
+    path('<slug:username>/', read_views.profile, name='profile'),
 ]
 
 urlpatterns = [
-    path('', views.index, name='index'),
+    path('', read_views.index, name='index'),
+    path('search/', views.search, name='search'),
+    path('export/', views.export_posts, name='export'),
     path('posts/', include(posts_urls)),
     path('profile/', include(profile_urls)),
     path(
         'category/<slug:category_slug>/',
-        views.category_posts,
+        read_views.category_posts,
         name='category_posts'
     ),
 ]
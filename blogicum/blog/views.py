@@ -1,71 +1,170 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
-from django.db.models import Q
-from django.db.models.aggregates import Count
+from django.db import transaction
+from django.db.models import Max, Q
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.utils import timezone as dt
 
-from blog.constants import LIMIT_FOR_PAGES
+from blog import metrics
+from blog.cache import (FEED_VERSION_KEY, cache_anonymous_page,
+                        conditional_page, feed_version_keys, get_version,
+                        make_etag, post_version_keys)
+from blog.constants import COMMENTS_BY_PAGE, LIMIT_FOR_PAGES
+from blog.export import EXPORTS, FORMATS, export_chunks, export_filename
+from blog.feeds import FEED_ORDERING, feed_count_key, feed_posts
 from blog.forms import CommentForm, EditProfileForm, PostForm
-from blog.models import Category, Comment, Post, User
+from blog.lookups import (published_category, published_category_ids,
+                          with_lookups)
+from blog.models import Comment, FeedEntry, Post, User
+from blog.paginators import (POST_ORDERING, CursorPaginator,
+                             EstimatedCountPaginator)
+from blog.routers import read_replica
+from blog.search import search_posts
+
+
+def cursor_requested(request):
+    return 'cursor' in request.GET or (
+        settings.BLOG_CURSOR_PAGINATION and 'page' not in request.GET
+    )
 
 
-def paginate_posts(request, posts, limit):
-    paginator = Paginator(posts, limit)
+def paginate_posts(request, posts, limit, ordering=POST_ORDERING,
+                   count_key=None):
+    if cursor_requested(request):
+        return CursorPaginator(posts, limit, ordering).get_page(
+            request.GET.get('cursor')
+        )
+    paginator = EstimatedCountPaginator(posts, limit, count_key=count_key)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return page_obj
 
 
+def paginate_comments(request, post_id):
+    return CursorPaginator(
+        Comment.objects.filter(post_id=post_id).select_related('author'),
+        COMMENTS_BY_PAGE,
+        ordering=('created_at', 'id'),
+    ).get_page(request.GET.get('cursor'))
+
+
 def check_auth(request):
     return Q(
-        category__is_published=True,
-        pub_date__lte=dt.now(),
+        category_id__in=published_category_ids(),
+        is_live=True,
         is_published=True
     ) | Q(author=request.user.id)
 
 
 def post_select_realted():
-    return Post.objects.select_related(
-        'category',
-        'location',
-        'author'
-    )
+    return with_lookups(Post.objects.select_related('author'))
 
 
-def count_comments(queryset):
-    return queryset.annotate(
-        comment_count=Count('comments')
-    ).order_by('-pub_date')
+def order_by_date(queryset):
+    return queryset.order_by('-pub_date')
 
 
 def select_posts():
     return post_select_realted().filter(
-        category__is_published=True,
-        pub_date__lte=dt.now(),
+        category_id__in=published_category_ids(),
+        is_live=True,
         is_published=True
     )
 
 
+def visible_post(request, post_id):
+    return get_object_or_404(
+        post_select_realted(),
+        Q(id=post_id),
+        check_auth(request)
+    )
+
+
+def profile_posts(request, profile):
+    """Посты профиля, порядок их страниц и ключ счётчика строк.
+
+    Автор видит все свои посты, остальные — ленту автора.
+    """
+    if request.user.id == profile.id:
+        posts = post_select_realted().filter(author=profile)
+        return order_by_date(posts), POST_ORDERING, None
+    posts = feed_posts(FeedEntry.AUTHOR, profile.id)
+    return (
+        posts.order_by(*FEED_ORDERING), FEED_ORDERING,
+        feed_count_key(FeedEntry.AUTHOR, profile.id),
+    )
+
+
+def feed_validators(request, posts):
+    dates = posts.aggregate(
+        last_pub_date=Max('pub_date'),
+        last_updated_at=Max('updated_at'),
+    )
+    return (
+        make_etag(request, get_version(FEED_VERSION_KEY), *dates.values()),
+        max(filter(None, dates.values()), default=None),
+    )
+
+
+def index_validators(request):
+    return feed_validators(request, select_posts())
+
+
+def category_validators(request, category_slug):
+    category = published_category(category_slug)
+    if category is None:
+        return None, None
+    return feed_validators(request, select_posts().filter(category=category))
+
+
+def profile_validators(request, username):
+    return feed_validators(request, Post.objects.filter(
+        Q(author__username=username),
+        check_auth(request)
+    ))
+
+
+def post_validators(request, post_id):
+    post = Post.objects.filter(
+        Q(id=post_id),
+        check_auth(request)
+    ).annotate(
+        last_comment_at=Max('comments__created_at')
+    ).values('updated_at', 'last_comment_at', 'comment_count').first()
+    if post is None:
+        return None, None
+    # Правки комментариев меняют версию поста в кэше.
+    versions = map(get_version, post_version_keys(request, post_id))
+    return (
+        make_etag(request, *versions, *post.values()),
+        max(post['updated_at'], post['last_comment_at'] or post['updated_at']),
+    )
+
+
+@read_replica
+@cache_anonymous_page(feed_version_keys)
+@conditional_page(index_validators)
 def index(request):
     """Главная страница"""
-    posts = count_comments(select_posts())
-    page_obj = paginate_posts(request, posts, LIMIT_FOR_PAGES)
+    posts = order_by_date(select_posts())
+    page_obj = paginate_posts(
+        request, posts, LIMIT_FOR_PAGES,
+        count_key=feed_count_key(FeedEntry.CATEGORY),
+    )
     context = {
         'page_obj': page_obj,
     }
     return render(request, 'blog/index.html', context)
 
 
+@read_replica
+@cache_anonymous_page(post_version_keys)
+@conditional_page(post_validators)
 def post_detail(request, post_id):
     """Страница с информацией о посте"""
-    post = get_object_or_404(
-        post_select_realted(),
-        Q(id=post_id),
-        check_auth(request)
-    )
+    post = visible_post(request, post_id)
     form = CommentForm()
-    comments = post.comments.select_related('author')
+    comments = paginate_comments(request, post_id)
     context = {
         'post': post,
         'form': form,
@@ -74,14 +173,37 @@ def post_detail(request, post_id):
     return render(request, 'blog/detail.html', context)
 
 
+@read_replica
+@cache_anonymous_page(post_version_keys)
+def post_comments(request, post_id):
+    """Следующая страница комментариев к посту"""
+    post = get_object_or_404(
+        Post.objects.only('id'),
+        Q(id=post_id),
+        check_auth(request)
+    )
+    context = {
+        'post': post,
+        'comments': paginate_comments(request, post_id),
+    }
+    return render(request, 'includes/comment_list.html', context)
+
+
+@read_replica
+@cache_anonymous_page(feed_version_keys)
+@conditional_page(category_validators)
 def category_posts(request, category_slug):
     """Страница с категорией поста"""
-    category = get_object_or_404(
-        Category,
-        is_published=True, slug=category_slug
+    category = published_category(category_slug)
+    if category is None:
+        raise Http404
+    posts = feed_posts(FeedEntry.CATEGORY, category.id).order_by(
+        *FEED_ORDERING
+    )
+    page_obj = paginate_posts(
+        request, posts, LIMIT_FOR_PAGES, FEED_ORDERING,
+        feed_count_key(FeedEntry.CATEGORY, category.id),
     )
-    posts = select_posts().filter(category=category)
-    page_obj = paginate_posts(request, posts, LIMIT_FOR_PAGES)
     context = {
         'category': category,
         'page_obj': page_obj,
@@ -89,6 +211,8 @@ def category_posts(request, category_slug):
     return render(request, 'blog/category.html', context)
 
 
+@read_replica
+@conditional_page(profile_validators)
 def profile(request, username):
     """Страница с профилем"""
     profile = get_object_or_404(
@@ -96,11 +220,10 @@ def profile(request, username):
         username=username,
     )
 
-    posts = count_comments(post_select_realted().filter(
-        Q(author__username=profile),
-        check_auth(request)
-    ))
-    page_obj = paginate_posts(request, posts, LIMIT_FOR_PAGES)
+    posts, ordering, count_key = profile_posts(request, profile)
+    page_obj = paginate_posts(
+        request, posts, LIMIT_FOR_PAGES, ordering, count_key
+    )
     context = {
         'profile': profile,
         'page_obj': page_obj,
@@ -108,6 +231,25 @@ def profile(request, username):
     return render(request, 'blog/profile.html', context)
 
 
+@read_replica
+def search(request):
+    """Поиск по публикациям"""
+    query = request.GET.get('q', '').strip()
+    page_obj = None
+    if query:
+        posts = search_posts(
+            post_select_realted().filter(check_auth(request)), query
+        )
+        page_obj = CursorPaginator(
+            posts, LIMIT_FOR_PAGES, ordering=('-score', '-id')
+        ).get_page(request.GET.get('cursor'))
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+    }
+    return render(request, 'blog/search.html', context)
+
+
 @login_required
 def create_post(request):
     """Страница создания публикации"""
@@ -141,15 +283,16 @@ def edit_profile(request):
     return render(request, 'blog/user.html', context)
 
 
-def get_post(post_id):
-    return get_object_or_404(Post, id=post_id)
+def get_post(post_id, *fields):
+    posts = Post.objects.only(*fields) if fields else Post.objects
+    return get_object_or_404(posts, id=post_id)
 
 
 @login_required
 def edit_post(request, post_id):
     """Страница редактирования публикации"""
     post = get_post(post_id)
-    if request.user != post.author:
+    if request.user.id != post.author_id:
         return redirect('blog:post_detail', post_id)
     form = PostForm(
         request.POST or None,
@@ -168,13 +311,16 @@ def edit_post(request, post_id):
 @login_required
 def delete_post(request, post_id):
     """Страница удаления публикации"""
-    post = get_post(post_id)
-    if request.user != post.author:
+    if request.method == 'POST':
+        post = get_post(post_id, 'author', 'image')
+    else:
+        post = get_post(post_id)
+    if request.user.id != post.author_id:
         return redirect('blog:post_detail', post_id)
-    form = PostForm(instance=post)
     if request.method == 'POST':
         post.delete()
         return redirect('blog:index')
+    form = PostForm(instance=post)
     context = {
         'form': form,
     }
@@ -182,14 +328,16 @@ def delete_post(request, post_id):
 
 
 @login_required
+@transaction.atomic
 def add_comment(request, post_id):
     """Добавление комментария"""
-    post = get_post(post_id)
+    if not Post.objects.filter(id=post_id).exists():
+        raise Http404('Публикация не найдена')
     form = CommentForm(request.POST)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
-        comment.post = post
+        comment.post_id = post_id
         comment.save()
     return redirect('blog:post_detail', post_id)
 
@@ -212,6 +360,7 @@ def edit_comment(request, post_id, comment_id):
 
 
 @login_required
+@transaction.atomic
 def delete_comment(request, post_id, comment_id):
     """Страница удаления комментария"""
     comment = get_object_or_404(Comment, id=comment_id)
@@ -224,3 +373,42 @@ def delete_comment(request, post_id, comment_id):
         'comment': comment,
     }
     return render(request, 'blog/comment.html', context)
+
+
+def metrics_page(request):
+    """Метрики в текстовом формате Prometheus"""
+    if (
+        request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS
+        and not request.user.is_staff
+    ):
+        raise Http404
+    return HttpResponse(
+        metrics.render(metrics.collect()),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+
+def export_posts(request):
+    """Потоковая выгрузка публикаций и комментариев для персонала"""
+    if not request.user.is_staff:
+        raise Http404
+    file_format = request.GET.get('format', 'jsonl')
+    model_names = request.GET.getlist('model') or (
+        ['post'] if file_format == 'csv' else list(EXPORTS)
+    )
+    if file_format not in FORMATS or not set(model_names) <= set(EXPORTS):
+        raise Http404
+    if file_format == 'csv' and len(model_names) != 1:
+        raise Http404
+    compress = request.GET.get('gzip') == '1'
+    response = StreamingHttpResponse(
+        export_chunks(model_names, file_format, compress),
+        content_type=(
+            'application/gzip' if compress
+            else 'text/csv; charset=utf-8' if file_format == 'csv'
+            else 'application/x-ndjson; charset=utf-8'
+        ),
+    )
+    filename = export_filename(model_names, file_format, compress)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
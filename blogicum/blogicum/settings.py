@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -28,11 +29,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'blog.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'blog.middleware.ProfilingMiddleware',
+    'blog.middleware.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -63,10 +67,49 @@ WSGI_APPLICATION = 'blogicum.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.getenv('BLOGICUM_SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
     }
 }
 
+# Реплики только для чтения, например BLOGICUM_REPLICA_DBS=db_replica.sqlite3
+# для локальной проверки на копии основной базы.
+for number, name in enumerate(
+    filter(None, os.getenv('BLOGICUM_REPLICA_DBS', '').split(',')), 1
+):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / name,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+READ_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+DATABASE_ROUTERS = ['blog.routers.ReplicaRouter']
+
+REPLICA_STICKY_COOKIE = 'use_primary_db'
+
+REPLICA_STICKY_SECONDS = 10
+
+# Кэш по умолчанию живёт в памяти процесса и годится только для разработки
+# с одним процессом, о чём предупреждает проверка blog.W001. По версиям
+# в кэше процессы сбрасывают кэш страниц, карточек и таблицы категорий
+# в памяти, поэтому на сервере с несколькими процессами задайте общий кэш:
+# BLOGICUM_CACHE_BACKEND=django.core.cache.backends.memcached.PyMemcacheCache
+# и BLOGICUM_CACHE_LOCATION=127.0.0.1:11211 или Redis через его бэкенд.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'BLOGICUM_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.getenv('BLOGICUM_CACHE_LOCATION', ''),
+    }
+}
+
+# Наибольший возраст категорий и местоположений в памяти процесса, секунды;
+# страховка на случай потерянной версии в кэше.
+LOOKUPS_MAX_AGE = 60
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -112,8 +155,45 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static_dev',
 ]
 
+# Асинхронные версии читающих страниц для запуска под ASGI.
+BLOG_ASYNC_VIEWS = os.getenv('BLOGICUM_ASYNC_VIEWS') == '1'
+
+# Выполнять фоновые задачи сразу при постановке в очередь, без воркера.
+BLOG_TASKS_EAGER = False
+
+# Базовая пауза перед повтором упавшей задачи, удваивается с каждой попыткой.
+BLOG_TASKS_RETRY_DELAY = 30
+
+# Каталог для снимков метрик, общий для всех процессов сервера.
+# Без него /metrics показывает только метрики обслужившего запрос процесса.
+METRICS_DIR = os.getenv('BLOGICUM_METRICS_DIR')
+
+METRICS_FLUSH_INTERVAL = 1
+
+# Замеры запросов: заголовок для персонала и доля случайных запросов.
+PROFILING_HEADER = 'X-Profile'
+
+PROFILING_SAMPLE_RATE = float(os.getenv('BLOGICUM_PROFILING_SAMPLE_RATE', 0))
+
+PROFILING_SLOW_QUERIES = 5
+
+PROFILING_LOG_FILE = BASE_DIR / 'logs' / 'profiling.jsonl'
+
+PROFILING_LOG_MAX_BYTES = 10 * 1024 * 1024
+
+PROFILING_LOG_BACKUPS = 5
+
+# Курсорная пагинация лент по (pub_date, id) вместо ?page=N.
+BLOG_CURSOR_PAGINATION = False
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 INTERNAL_IPS = [
     '127.0.0.1',
 ]
+
+# Адреса, с которых Prometheus может читать /metrics без входа, например
+# BLOGICUM_METRICS_ALLOWED_IPS=10.0.0.5,10.0.0.6. По умолчанию — никто.
+METRICS_ALLOWED_IPS = list(
+    filter(None, os.getenv('BLOGICUM_METRICS_ALLOWED_IPS', '').split(','))
+)
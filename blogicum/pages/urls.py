@@ -1,17 +1,23 @@
 from django.urls import path
 from django.views.generic import TemplateView
 
+from blog.routers import read_replica
+
 app_name = 'pages'
 
 urlpatterns = [
     path(
         'about/',
-        TemplateView.as_view(template_name='pages/about.html'),
+        read_replica(
+            TemplateView.as_view(template_name='pages/about.html')
+        ),
         name='about'
     ),
     path(
         'rules/',
-        TemplateView.as_view(template_name='pages/rules.html'),
+        read_replica(
+            TemplateView.as_view(template_name='pages/rules.html')
+        ),
         name='rules'
     ),
 ]
@@ -32,6 +32,28 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def run_tasks_inline():
+    with override_settings(BLOG_TASKS_EAGER=True):
+        yield
+
+
+@pytest.fixture(scope="session", autouse=True)
+def temporary_media_root(tmp_path_factory):
+    # Загрузки, миниатюры и блокировка ссылок не остаются в blogicum/media.
+    with override_settings(MEDIA_ROOT=tmp_path_factory.mktemp("media")):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import cache
+
+    cache.clear()
+    yield
+    cache.clear()
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -354,6 +376,7 @@ def cleanup(request):
                     filename.endswith(".jpg")
                     or filename.endswith(".gif")
                     or filename.endswith(".png")
+                    or filename.endswith(".webp")
             ):
                 file_path = os.path.join(root, filename)
                 if os.path.getmtime(file_path) >= start_time:
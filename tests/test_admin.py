@@ -0,0 +1,74 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import RowCount
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def admin_client(client, admin_user):
+    client.force_login(admin_user)
+    return client
+
+
+def make_posts(mixer, count):
+    authors = mixer.cycle(count).blend("auth.User")
+    categories = mixer.cycle(3).blend("blog.Category", is_published=True)
+    posts = mixer.cycle(count).blend(
+        "blog.Post", author=(author for author in authors),
+        category=(categories[number % 3] for number in range(count)),
+        image=None,
+    )
+    for post in posts[:2]:
+        mixer.blend("blog.Comment", post=post, author=post.author)
+    return posts
+
+
+def changelist_queries(client, url):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(ctx.captured_queries), response.content.decode("utf-8")
+
+
+@pytest.mark.parametrize("url", ["/admin/blog/post/", "/admin/blog/comment/"])
+def test_changelist_queries_do_not_grow(admin_client, mixer, url):
+    make_posts(mixer, 3)
+    admin_client.get(url)
+    small, _ = changelist_queries(admin_client, url)
+    make_posts(mixer, 30)
+    large, _ = changelist_queries(admin_client, url)
+    assert large == small
+
+
+def test_author_filter_is_input(admin_client, mixer):
+    posts = make_posts(mixer, 5)
+    author = posts[0].author.username
+    _, content = changelist_queries(admin_client, "/admin/blog/post/")
+    assert f"?author={author}" not in content
+    _, content = changelist_queries(
+        admin_client, f"/admin/blog/post/?author={author}"
+    )
+    assert posts[0].title in content
+    assert posts[1].title not in content
+
+
+def test_comment_post_filter(admin_client, mixer):
+    posts = make_posts(mixer, 3)
+    response = admin_client.get(f"/admin/blog/comment/?post={posts[1].id}")
+    assert response.context["cl"].result_count == 1
+    response = admin_client.get("/admin/blog/comment/?post=x")
+    assert response.context["cl"].result_count == 0
+
+
+def test_changelist_uses_row_counter(admin_client, mixer):
+    posts = make_posts(mixer, 3)
+    RowCount.objects.filter(key="blog_post").update(count=50000)
+    response = admin_client.get("/admin/blog/post/")
+    assert response.context["cl"].result_count == 50000
+    response = admin_client.get(
+        f"/admin/blog/post/?author={posts[0].author.username}"
+    )
+    assert response.context["cl"].result_count == 1
@@ -0,0 +1,74 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.http import Http404
+from django.test import RequestFactory
+
+from blog import async_views, views
+
+pytestmark = [pytest.mark.django_db(transaction=True)]
+
+
+@pytest.fixture
+def posts(mixer, user, published_category):
+    return mixer.cycle(12).blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        is_published=True,
+    )
+
+
+def get(view, user, path="/", **kwargs):
+    request = RequestFactory().get(path)
+    request.user = user
+    if view.__module__ == async_views.__name__:
+        return async_to_sync(view)(request, **kwargs)
+    return view(request, **kwargs)
+
+
+def titles(response, posts):
+    content = response.content.decode("utf-8")
+    return [post.title for post in posts if post.title in content]
+
+
+@pytest.mark.parametrize(
+    ("name", "kwargs"),
+    [
+        ("index", lambda post: {}),
+        ("category_posts", lambda post: {
+            "category_slug": post.category.slug
+        }),
+        ("profile", lambda post: {"username": post.author.username}),
+    ],
+)
+@pytest.mark.parametrize("path", ["/", "/?page=2", "/?page=9", "/?cursor="])
+def test_async_feed_matches_sync(name, kwargs, path, user, posts):
+    params = kwargs(posts[0])
+    expected = get(getattr(views, name), user, path, **params)
+    response = get(getattr(async_views, name), user, path, **params)
+    assert response.status_code == expected.status_code == 200
+    assert titles(response, posts) == titles(expected, posts)
+    assert titles(response, posts)
+
+
+def test_async_post_detail(mixer, user, posts):
+    comment = mixer.blend(
+        "blog.Comment", post=posts[0], author=user, text="Асинхронный"
+    )
+    response = get(async_views.post_detail, user, post_id=posts[0].id)
+    content = response.content.decode("utf-8")
+    assert posts[0].title in content
+    assert comment.text in content
+
+
+@pytest.mark.parametrize(
+    ("name", "kwargs"),
+    [
+        ("post_detail", {"post_id": 10 ** 6}),
+        ("category_posts", {"category_slug": "missing"}),
+        ("profile", {"username": "missing"}),
+    ],
+)
+def test_async_views_raise_404(name, kwargs, user):
+    with pytest.raises(Http404):
+        get(getattr(async_views, name), user, **kwargs)
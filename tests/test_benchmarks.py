@@ -0,0 +1,24 @@
+from urllib.parse import urlsplit
+
+import pytest
+
+from benchmarks.load import drive, percentile
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([7], 99) == 7
+    assert percentile([], 50) is None
+
+
+@pytest.mark.django_db(transaction=True)
+def test_drive_reports_latency(live_server):
+    url = urlsplit(live_server.url)
+    result = drive(url.hostname, url.port, "/pages/about/", 6, 3)
+    assert result["requests"] == 6
+    assert result["errors"] == 0
+    assert result["rps"] > 0
+    assert result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
@@ -0,0 +1,77 @@
+import pytest
+from django.core.management import call_command
+
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_comment_views_update_stored_count(
+        user_client, post_with_published_location):
+    post = post_with_published_location
+    for text in ("first", "second"):
+        user_client.post(f"/posts/{post.id}/comment/", {"text": text})
+    post.refresh_from_db()
+    assert post.comment_count == 2
+
+    comment = Comment.objects.filter(post=post).first()
+    user_client.post(f"/posts/{post.id}/delete_comment/{comment.id}/")
+    post.refresh_from_db()
+    assert post.comment_count == 1
+
+
+def test_post_save_keeps_stored_count(mixer, post_with_published_location):
+    post = Post.objects.get(pk=post_with_published_location.pk)
+    mixer.blend("blog.Comment", post=post)
+    post.title = "new title"
+    post.save()
+    post.refresh_from_db()
+    assert post.comment_count == 1
+
+
+def test_rebuild_comment_counts_command(mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(3).blend("blog.Comment", post=post)
+    Post.objects.filter(pk=post.pk).update(comment_count=42)
+    call_command("rebuild_comment_counts", stdout=open("/dev/null", "w"))
+    post.refresh_from_db()
+    assert post.comment_count == 3
+
+
+def test_moved_comment_updates_both_counts(
+        mixer, post_with_published_location):
+    first = post_with_published_location
+    second = mixer.blend("blog.Post", author=first.author)
+    comment = mixer.blend("blog.Comment", post=first)
+    comment = Comment.objects.get(pk=comment.pk)
+    comment.post = second
+    comment.save()
+    assert Post.objects.get(pk=first.pk).comment_count == 0
+    assert Post.objects.get(pk=second.pk).comment_count == 1
+    second.delete()
+    assert Post.objects.get(pk=first.pk).comment_count == 0
+
+
+def test_count_never_drops_below_zero(mixer, post_with_published_location):
+    post = post_with_published_location
+    comment = mixer.blend("blog.Comment", post=post)
+    Post.objects.filter(pk=post.pk).update(comment_count=0)
+    comment.delete()
+    post.refresh_from_db()
+    assert post.comment_count == 0
+
+
+def test_raw_fixture_keeps_stored_count(
+        mixer, post_with_published_location, tmp_path):
+    post = post_with_published_location
+    mixer.blend("blog.Comment", post=post)
+    fixture = tmp_path / "comments.json"
+    call_command(
+        "dumpdata", "blog.Post", "blog.Comment", output=str(fixture),
+        verbosity=0,
+    )
+    Comment.objects.all().delete()
+    Post.objects.filter(pk=post.pk).update(comment_count=0)
+    call_command("loaddata", str(fixture), verbosity=0)
+    post.refresh_from_db()
+    assert post.comment_count == 1
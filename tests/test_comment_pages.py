@@ -0,0 +1,54 @@
+import re
+
+import pytest
+
+from blog.constants import COMMENTS_BY_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+MORE_RE = re.compile(r'href="(/posts/\d+/comments/\?cursor=[\w-]+)"')
+
+
+@pytest.fixture
+def many_comments(mixer, user, post_with_published_location):
+    return mixer.cycle(COMMENTS_BY_PAGE + 5).blend(
+        "blog.Comment", post=post_with_published_location, author=user,
+        text=mixer.sequence("comment-text-{0}"),
+    )
+
+
+def comment_texts(content):
+    return re.findall(r"comment-text-\d+", content)
+
+
+def test_post_detail_renders_first_comments_page(
+        client, post_with_published_location, many_comments):
+    content = client.get(
+        f"/posts/{post_with_published_location.id}/"
+    ).content.decode("utf-8")
+    texts = comment_texts(content)
+    assert texts == [c.text for c in many_comments[:COMMENTS_BY_PAGE]]
+    assert MORE_RE.search(content)
+
+
+def test_comments_page_continues_after_cursor(
+        user_client, post_with_published_location, many_comments):
+    content = user_client.get(
+        f"/posts/{post_with_published_location.id}/"
+    ).content.decode("utf-8")
+    more_url = MORE_RE.search(content).group(1)
+    response = user_client.get(more_url)
+    assert response.status_code == 200
+    more = response.content.decode("utf-8")
+    assert comment_texts(more) == [
+        c.text for c in many_comments[COMMENTS_BY_PAGE:]
+    ]
+    assert not MORE_RE.search(more)
+    assert "<html" not in more
+
+
+def test_comments_page_of_hidden_post(
+        another_user_client, unpublished_posts_with_published_locations):
+    post = unpublished_posts_with_published_locations[0]
+    response = another_user_client.get(f"/posts/{post.id}/comments/")
+    assert response.status_code == 404
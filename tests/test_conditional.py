@@ -0,0 +1,92 @@
+from http import HTTPStatus
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+URLS = [
+    "/",
+    "/posts/{post.id}/",
+    "/category/{post.category.slug}/",
+    "/profile/{post.author.username}/",
+]
+
+
+@pytest.mark.parametrize("url", URLS)
+@pytest.mark.parametrize("client_name", ["client", "user_client"])
+def test_not_modified_by_etag(
+        request, client_name, post_with_published_location, url):
+    client = request.getfixturevalue(client_name)
+    url = url.format(post=post_with_published_location)
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    assert response.has_header("ETag")
+    assert response.has_header("Last-Modified")
+    response = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+@pytest.mark.parametrize("url", URLS)
+def test_not_modified_by_last_modified(
+        user_client, post_with_published_location, url):
+    url = url.format(post=post_with_published_location)
+    response = user_client.get(url)
+    response = user_client.get(
+        url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+    )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_etag_changes_after_comment(
+        mixer, user_client, post_with_published_location):
+    url = f"/posts/{post_with_published_location.id}/"
+    etag = user_client.get(url)["ETag"]
+    mixer.blend("blog.Comment", post=post_with_published_location)
+    response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response["ETag"] != etag
+
+
+def test_etag_depends_on_user(
+        user_client, another_user_client, post_with_published_location):
+    url = f"/posts/{post_with_published_location.id}/"
+    etag = user_client.get(url)["ETag"]
+    response = another_user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_etag_changes_after_login(client, user, post_with_published_location):
+    user.set_password("password")
+    user.save()
+    credentials = {"username": user.username, "password": "password"}
+    url = f"/posts/{post_with_published_location.id}/"
+    client.post("/auth/login/", credentials)
+    etag = client.get(url)["ETag"]
+    client.post("/auth/logout/")
+    client.post("/auth/login/", credentials)
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response["ETag"] != etag
+
+
+def test_hidden_post_has_no_validators(
+        another_user_client, unpublished_posts_with_published_locations):
+    post = unpublished_posts_with_published_locations[0]
+    response = another_user_client.get(f"/posts/{post.id}/")
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert not response.has_header("ETag")
+
+
+def test_fixture_posts_get_updated_at():
+    call_command(
+        "loaddata",
+        Path(__file__).parent.parent / "db.json",
+        exclude=["admin.logentry", "auth.permission", "sessions"],
+        verbosity=0,
+    )
+    assert Post.objects.exists()
+    assert not Post.objects.filter(updated_at__isnull=True).exists()
@@ -0,0 +1,91 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.export import export_chunks
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def exported_posts(mixer, user):
+    posts = mixer.cycle(5).blend(
+        "blog.Post", author=user, image=None, is_published=True
+    )
+    for post in posts[:2]:
+        mixer.cycle(3).blend("blog.Comment", post=post, author=user)
+    return posts
+
+
+def read_jsonl(data):
+    return [json.loads(line) for line in data.decode("utf-8").splitlines()]
+
+
+def test_jsonl_joins_names_in_batches(exported_posts, user):
+    with CaptureQueriesContext(connection) as queries:
+        data = b"".join(export_chunks(["post", "comment"], batch_size=2))
+    records = read_jsonl(data)
+    posts = [record for record in records if record["model"] == "post"]
+    comments = [record for record in records if record["model"] == "comment"]
+    assert [record["id"] for record in posts] == sorted(
+        post.id for post in exported_posts
+    )
+    assert len(comments) == Comment.objects.count() == 6
+    assert posts[0]["author"] == user.username
+    assert posts[0]["category"] == Post.objects.get(
+        id=posts[0]["id"]
+    ).category.slug
+    assert comments[0]["author"] == user.username
+    # По запросу на пачку и по одному пустому в конце каждой таблицы.
+    assert len(queries) == 3 + 1 + 3 + 1
+    assert all("OFFSET" not in query["sql"] for query in queries)
+
+
+def test_gzip_csv(exported_posts):
+    data = b"".join(export_chunks(["post"], "csv", compress=True))
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(data).decode())))
+    assert len(rows) == 5
+    assert {"id", "title", "author", "category", "location"} <= set(rows[0])
+
+
+def test_csv_requires_single_model():
+    with pytest.raises(ValueError):
+        list(export_chunks(["post", "comment"], "csv"))
+
+
+def test_export_command_roundtrip(tmp_path, exported_posts):
+    path = tmp_path / "blog.jsonl.gz"
+    call_command(
+        "export_blog", "-o", str(path), "--gzip", stdout=io.StringIO()
+    )
+    source = tmp_path / "blog.jsonl"
+    source.write_bytes(gzip.decompress(path.read_bytes()))
+    assert len(read_jsonl(source.read_bytes())) == 11
+    Comment.objects.all().delete()
+    Post.objects.all().delete()
+    call_command("import_blog", str(source), stdout=io.StringIO())
+    assert Post.objects.count() == 5
+    assert Comment.objects.count() == 6
+
+
+def test_export_view_is_staff_only(user_client, exported_posts):
+    assert user_client.get("/export/").status_code == 404
+
+
+def test_export_view_streams(client, admin_user, exported_posts):
+    client.force_login(admin_user)
+    response = client.get("/export/?format=csv&model=comment&gzip=1")
+    assert response.status_code == 200
+    assert response.streaming
+    assert response["Content-Disposition"] == (
+        'attachment; filename="blog-comment.csv.gz"'
+    )
+    text = gzip.decompress(b"".join(response.streaming_content)).decode()
+    assert len(list(csv.DictReader(io.StringIO(text)))) == 6
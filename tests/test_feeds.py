@@ -0,0 +1,145 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.feeds import FEED_ORDERING, feed_posts
+from blog.models import Category, FeedEntry, Post
+from blog.scheduler import publish_due_posts
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def feed_post(mixer, user, published_category):
+    return mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, image=None,
+        pub_date=timezone.now() - timedelta(hours=1),
+    )
+
+
+def entries(post):
+    return set(FeedEntry.objects.filter(post=post).values_list(
+        "kind", "owner_id"
+    ))
+
+
+def test_visible_post_is_in_both_feeds(feed_post, user, published_category):
+    assert entries(feed_post) == {
+        (FeedEntry.CATEGORY, published_category.id),
+        (FeedEntry.AUTHOR, user.id),
+    }
+
+
+def test_hidden_posts_are_not_in_feeds(
+        mixer, user, published_category, future_posts,
+        posts_with_unpublished_category):
+    mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=False,
+    )
+    assert not FeedEntry.objects.exists()
+
+
+def test_edit_without_feed_changes_skips_feeds(feed_post):
+    feed_post = Post.objects.get(id=feed_post.id)
+    feed_post.title = "Новый заголовок"
+    with CaptureQueriesContext(connection) as ctx:
+        feed_post.save()
+    assert not [
+        query for query in ctx.captured_queries
+        if "blog_feedentry" in query["sql"]
+    ]
+
+
+def test_post_moves_between_feeds(feed_post, another_category):
+    feed_post.category = another_category
+    feed_post.save()
+    assert (FeedEntry.CATEGORY, another_category.id) in entries(feed_post)
+    feed_post.is_published = False
+    feed_post.save()
+    assert entries(feed_post) == set()
+
+
+def test_category_toggle_and_delete(feed_post, published_category):
+    published_category.is_published = False
+    published_category.save()
+    assert entries(feed_post) == set()
+    published_category.is_published = True
+    published_category.save()
+    assert len(entries(feed_post)) == 2
+    published_category.delete()
+    assert entries(feed_post) == set()
+
+
+def test_category_edit_keeps_feeds(feed_post, published_category):
+    category = Category.objects.get(id=published_category.id)
+    category.title = "Новое название"
+    with CaptureQueriesContext(connection) as ctx:
+        category.save()
+    assert not [
+        query for query in ctx.captured_queries
+        if "blog_feedentry" in query["sql"]
+    ]
+    assert entries(feed_post)
+
+
+def test_scheduler_adds_posts_to_feeds(mixer, user, published_category):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() + timedelta(hours=1),
+    )
+    assert entries(post) == set()
+    Post.objects.filter(id=post.id).update(
+        pub_date=timezone.now() - timedelta(seconds=1)
+    )
+    publish_due_posts()
+    assert len(entries(post)) == 2
+
+
+def test_category_page_reads_feed_index(feed_post, published_category):
+    queryset = feed_posts(
+        FeedEntry.CATEGORY, published_category.id
+    ).order_by(*FEED_ORDERING)[:10]
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        plan = "\n".join(str(row[-1]) for row in cursor.fetchall())
+    assert "feed_entry_page_idx" in plan
+    assert "TEMP B-TREE" not in plan
+    assert list(queryset) == [feed_post]
+
+
+def test_feed_pages_with_cursor(client, mixer, user, published_category):
+    now = timezone.now()
+    posts = mixer.cycle(15).blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, image=None,
+        pub_date=(now - timedelta(minutes=number) for number in range(15)),
+    )
+    first = client.get(f"/category/{published_category.slug}/?cursor=")
+    page = first.context["page_obj"]
+    assert [post.id for post in page] == [post.id for post in posts[:10]]
+    second = client.get(
+        f"/category/{published_category.slug}/?cursor={page.next_cursor}"
+    )
+    assert [post.id for post in second.context["page_obj"]] == [
+        post.id for post in posts[10:]
+    ]
+
+
+def test_check_feeds_reports_and_fixes(feed_post):
+    call_command("check_feeds", stdout=StringIO())
+    FeedEntry.objects.filter(kind=FeedEntry.AUTHOR).delete()
+    with pytest.raises(CommandError, match="Недостающих строк: 1"):
+        call_command("check_feeds", stdout=StringIO())
+    out = StringIO()
+    call_command("check_feeds", "--fix", stdout=out)
+    assert "пересобраны ленты постов: 1" in out.getvalue()
+    assert len(entries(feed_post)) == 2
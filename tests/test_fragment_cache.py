@@ -0,0 +1,55 @@
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+
+from blog.cache import post_card_key
+
+pytestmark = [pytest.mark.django_db]
+
+
+def index_content(client) -> str:
+    return client.get("/").content.decode("utf-8")
+
+
+def rename_post(post):
+    post.title = "Новый заголовок"
+    post.save()
+    return post.title
+
+
+def rename_category(post):
+    post.category.title = "Новая категория"
+    post.category.save()
+    return post.category.title
+
+
+def rename_author(post):
+    post.author.username = "renamed-author"
+    post.author.save()
+    return post.author.username
+
+
+def test_post_card_is_cached(client, post_with_published_location):
+    post = post_with_published_location
+    post.refresh_from_db()
+    key = post_card_key(post, AnonymousUser())
+    assert cache.get(key) is None
+    index_content(client)
+    assert post.title in cache.get(key)
+
+
+@pytest.mark.parametrize(
+    "change", [rename_post, rename_category, rename_author]
+)
+def test_post_card_invalidated_on_change(
+        client, post_with_published_location, change):
+    index_content(client)
+    marker = change(post_with_published_location)
+    assert marker in index_content(client)
+
+
+def test_post_card_invalidated_on_comment(
+        mixer, client, post_with_published_location):
+    assert "Комментарии (0)" in index_content(client)
+    mixer.blend("blog.Comment", post=post_with_published_location)
+    assert "Комментарии (1)" in index_content(client)
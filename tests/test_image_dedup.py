@@ -0,0 +1,120 @@
+import hashlib
+import random
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.images import ImageFile
+from django.core.management import call_command
+from PIL import Image
+
+from blog.constants import THUMBNAIL_WIDTHS
+from blog.images import delete_thumbnails, thumbnail_name
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def image_bytes():
+    color = tuple(random.randrange(256) for _ in range(3))
+    buffer = BytesIO()
+    Image.new("RGB", (400, 200), color=color).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def make_post(mixer, user, published_category):
+    def make(content, name="photo.jpg"):
+        return mixer.blend(
+            "blog.Post",
+            author=user,
+            category=published_category,
+            image=ImageFile(BytesIO(content), name=name),
+        )
+
+    return make
+
+
+def test_same_upload_is_stored_once(make_post, image_bytes):
+    first = make_post(image_bytes, "first.jpg")
+    second = make_post(image_bytes, "second.JPG")
+    digest = hashlib.sha256(image_bytes).hexdigest()
+    assert first.image.name == second.image.name
+    assert first.image.name.endswith(f"/{digest[:2]}/{digest}.jpg")
+    assert first.image.storage.exists(first.image.name)
+
+
+def test_file_deleted_with_last_reference(
+        make_post, image_bytes, django_capture_on_commit_callbacks):
+    first = make_post(image_bytes)
+    second = make_post(image_bytes)
+    name, storage = first.image.name, first.image.storage
+    thumbnail = thumbnail_name(name, THUMBNAIL_WIDTHS[0], "webp")
+    assert storage.exists(thumbnail)
+    with django_capture_on_commit_callbacks(execute=True):
+        first.delete()
+    assert storage.exists(name)
+    with django_capture_on_commit_callbacks(execute=True):
+        Post.objects.get(id=second.id).delete()
+    assert not storage.exists(name)
+    assert not storage.exists(thumbnail)
+
+
+def test_replaced_image_is_released(
+        make_post, image_bytes, django_capture_on_commit_callbacks):
+    post = make_post(image_bytes)
+    old_name = post.image.name
+    post = Post.objects.get(id=post.id)
+    buffer = BytesIO()
+    Image.new("RGB", (300, 300), color=(1, 2, 3)).save(buffer, "PNG")
+    post.image = ContentFile(buffer.getvalue(), name="other.png")
+    with django_capture_on_commit_callbacks(execute=True):
+        post.save()
+    assert post.image.name != old_name
+    assert not post.image.storage.exists(old_name)
+
+
+def test_dedupe_images_command(make_post, image_bytes):
+    posts = [make_post(image_bytes) for _ in range(2)]
+    storage = posts[0].image.storage
+    hashed = posts[0].image.name
+    storage.delete(hashed)
+    legacy = []
+    for post in posts:
+        name = storage.save(
+            f"posts_images/legacy_{post.id}.jpg", ContentFile(image_bytes)
+        )
+        Post.objects.filter(id=post.id).update(
+            image=name, thumbnails_image=name
+        )
+        legacy.append(name)
+    out = StringIO()
+    call_command("dedupe_images", stdout=out)
+    assert f"освобождается байт: {len(image_bytes)}" in out.getvalue()
+    assert set(
+        Post.objects.filter(id__in=[post.id for post in posts])
+        .values_list("image", flat=True)
+    ) == {hashed}
+    assert all(
+        post.thumbnails_ready
+        for post in Post.objects.filter(id__in=[post.id for post in posts])
+    )
+    assert storage.exists(hashed)
+    assert not any(storage.exists(name) for name in legacy)
+
+
+def test_upload_restores_file_deleted_before_commit(
+        make_post, image_bytes, django_capture_on_commit_callbacks):
+    first = make_post(image_bytes)
+    name, storage = first.image.name, first.image.storage
+    thumbnail = thumbnail_name(name, THUMBNAIL_WIDTHS[0], "webp")
+    with django_capture_on_commit_callbacks(execute=True):
+        second = make_post(image_bytes)
+        # Другой процесс удалил последний пост с этим файлом и не видит
+        # незакоммиченную загрузку.
+        storage.delete(name)
+        delete_thumbnails(name, storage)
+    assert storage.exists(name)
+    assert storage.exists(thumbnail)
+    assert Post.objects.get(id=second.id).thumbnails_ready
@@ -0,0 +1,138 @@
+import csv
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from blog.importer import Importer
+from blog.models import Category, Comment, Location, Post, User
+
+pytestmark = [pytest.mark.django_db]
+
+CREATED_AT = "2020-05-01T10:00:00+00:00"
+
+
+def write_jsonl(path, records):
+    path.write_text(
+        "\n".join(json.dumps(record, ensure_ascii=False) for record in records)
+    )
+    return path
+
+
+@pytest.fixture
+def blog_records():
+    records = [
+        {"model": "user", "username": "legacy_author"},
+        {"model": "blog.category", "title": "Старое", "slug": "legacy",
+         "description": "Категория из старого блога"},
+        {"model": "location", "name": "Архив"},
+    ]
+    for number in range(1, 6):
+        records.append({
+            "model": "post", "id": 1000 + number,
+            "title": f"Пост {number}", "text": "Текст",
+            "pub_date": CREATED_AT, "created_at": CREATED_AT,
+            "author": "legacy_author", "category": "legacy",
+            "location": "Архив",
+        })
+    for number in range(7):
+        records.append({
+            "model": "comment", "post": 1001, "author": "legacy_author",
+            "text": f"Комментарий {number}", "created_at": CREATED_AT,
+        })
+    return records
+
+
+def test_import_jsonl(tmp_path, blog_records):
+    path = write_jsonl(tmp_path / "blog.jsonl", blog_records)
+    out = StringIO()
+    call_command("import_blog", str(path), "--batch-size", "4", stdout=out)
+    assert User.objects.filter(username="legacy_author").exists()
+    assert Category.objects.filter(slug="legacy").exists()
+    assert Location.objects.filter(name="Архив").exists()
+    posts = Post.objects.filter(id__gt=1000)
+    assert posts.count() == 5
+    post = posts.get(id=1001)
+    assert post.comment_count == 7
+    assert post.created_at.isoformat() == CREATED_AT
+    assert Comment.objects.filter(post=post).first().created_at.year == 2020
+    assert "зап/с" in out.getvalue()
+    assert not (tmp_path / "blog.jsonl.checkpoint").exists()
+
+
+def test_import_dumpdata_records(tmp_path):
+    records = [
+        {"model": "blog.category", "pk": 77, "fields": {
+            "title": "Фикстура", "slug": "fixture", "description": "Описание",
+            "is_published": True, "created_at": CREATED_AT,
+        }},
+        {"model": "auth.user", "pk": 88, "fields": {"username": "fixture"}},
+        {"model": "blog.post", "pk": 99, "fields": {
+            "title": "Из фикстуры", "text": "Текст", "pub_date": CREATED_AT,
+            "author": 88, "category": 77, "location": None,
+        }},
+    ]
+    path = write_jsonl(tmp_path / "dump.jsonl", records)
+    call_command("import_blog", str(path), stdout=StringIO())
+    post = Post.objects.get(id=99)
+    assert (post.author_id, post.category_id) == (88, 77)
+
+
+def test_import_csv_with_model(tmp_path, user, published_category):
+    path = tmp_path / "posts.csv"
+    with path.open("w", newline="", encoding="utf-8") as file:
+        writer = csv.DictWriter(file, fieldnames=(
+            "title", "text", "pub_date", "author", "category", "location",
+            "is_published",
+        ))
+        writer.writeheader()
+        for number in range(3):
+            writer.writerow({
+                "title": f"CSV {number}", "text": "Текст",
+                "pub_date": "2021-01-01 12:00:00",
+                "author": user.username, "category": published_category.slug,
+                "location": "", "is_published": "false",
+            })
+        writer.writerow({
+            "title": "Без автора", "text": "Текст",
+            "pub_date": "2021-01-01 12:00:00", "author": "nobody",
+            "category": published_category.slug, "location": "",
+            "is_published": "true",
+        })
+    out = StringIO()
+    call_command(
+        "import_blog", str(path), "--model", "post", stdout=out,
+        stderr=StringIO(),
+    )
+    imported = Post.objects.filter(title__startswith="CSV")
+    assert imported.count() == 3
+    assert not imported.filter(is_published=True).exists()
+    assert not Post.objects.filter(title="Без автора").exists()
+    assert "пропущено post: 1" in out.getvalue()
+
+
+def test_import_resumes_after_failure(tmp_path, blog_records, monkeypatch):
+    path = write_jsonl(tmp_path / "blog.jsonl", blog_records)
+    original = Importer.import_chunk
+    calls = []
+
+    def failing_chunk(self, records, default_model=None):
+        calls.append(len(records))
+        if len(calls) == 3:
+            raise RuntimeError("Сбой импорта")
+        return original(self, records, default_model)
+
+    monkeypatch.setattr(Importer, "import_chunk", failing_chunk)
+    with pytest.raises(RuntimeError):
+        call_command("import_blog", str(path), "--batch-size", "4",
+                     stdout=StringIO())
+    checkpoint = tmp_path / "blog.jsonl.checkpoint"
+    assert json.loads(checkpoint.read_text()) == {"records": 8}
+    monkeypatch.setattr(Importer, "import_chunk", original)
+    out = StringIO()
+    call_command("import_blog", str(path), "--batch-size", "4", stdout=out)
+    assert "продолжение с записи 8" in out.getvalue()
+    assert Post.objects.filter(id__gt=1000).count() == 5
+    assert Comment.objects.filter(post_id=1001).count() == 7
+    assert Post.objects.get(id=1001).comment_count == 7
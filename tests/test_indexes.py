@@ -0,0 +1,83 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.models import Comment, Post
+from blog.paginators import CursorPaginator
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(
+        connection.vendor != "sqlite", reason="EXPLAIN QUERY PLAN is SQLite"
+    ),
+]
+
+
+def explain(queryset) -> str:
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return "\n".join(str(row[-1]) for row in cursor.fetchall())
+
+
+@pytest.mark.parametrize(
+    ("make_queryset", "index_names"),
+    [
+        (
+            lambda user, category: Post.objects.filter(
+                is_published=True, is_live=True
+            ).order_by("-pub_date"),
+            ("post_feed_pub_date_idx", "post_published_pub_date_idx"),
+        ),
+        (
+            lambda user, category: Post.objects.filter(
+                category=category, pub_date__lte=timezone.now()
+            ).order_by("-pub_date"),
+            ("post_category_pub_date_idx",),
+        ),
+        (
+            lambda user, category: Post.objects.filter(
+                author=user
+            ).order_by("-pub_date"),
+            ("post_author_pub_date_idx",),
+        ),
+    ],
+    ids=["feed", "category", "profile"],
+)
+def test_post_feed_queries_use_indexes(
+        make_queryset, index_names, user, published_category):
+    plan = explain(make_queryset(user, published_category))
+    assert any(name in plan for name in index_names), (
+        f"Запрос ленты не использует индексы {index_names}:\n{plan}"
+    )
+    assert "USE TEMP B-TREE FOR ORDER BY" not in plan, (
+        f"Сортировка ленты не должна выполняться отдельно:\n{plan}"
+    )
+
+
+def test_comment_pages_use_index(mixer, user, post_with_published_location):
+    mixer.cycle(3).blend(
+        "blog.Comment", post=post_with_published_location, author=user
+    )
+    paginator = CursorPaginator(
+        Comment.objects.filter(
+            post_id=post_with_published_location.id
+        ).select_related("author"),
+        1,
+        ordering=("created_at", "id"),
+    )
+    with CaptureQueriesContext(connection) as ctx:
+        page = paginator.get_page(None)
+        page = paginator.get_page(page.next_cursor)
+        paginator.get_page(page.previous_cursor)
+    for query in ctx.captured_queries:
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {query['sql']}")
+            plan = "\n".join(str(row[-1]) for row in cursor.fetchall())
+        assert "comment_post_page_idx" in plan, (
+            f"Страница комментариев не использует индекс:\n{plan}"
+        )
+        assert "USE TEMP B-TREE FOR ORDER BY" not in plan, (
+            f"Сортировка комментариев не должна выполняться отдельно:\n{plan}"
+        )
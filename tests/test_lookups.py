@@ -0,0 +1,104 @@
+import pytest
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog import lookups
+from blog.cache import LOOKUPS_VERSION_KEY
+from blog.checks import shared_cache_check
+from blog.models import Category, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def get_with_queries(client, url):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    return response, [query["sql"] for query in ctx.captured_queries]
+
+
+def test_feed_reads_lookups_from_memory(client, post_with_published_location):
+    post = post_with_published_location
+    lookups.get_tables()
+    response, queries = get_with_queries(client, "/")
+    assert response.status_code == 200
+    content = response.content.decode("utf-8")
+    assert post.category.title in content
+    assert post.location.name in content
+    assert not [
+        sql for sql in queries
+        if "blog_category" in sql or "blog_location" in sql
+    ]
+
+
+def test_unknown_category_is_404_without_queries(client, published_category):
+    lookups.get_tables()
+    response, queries = get_with_queries(client, "/category/missing/")
+    assert response.status_code == 404
+    assert queries == []
+
+
+def test_lookups_reload_after_admin_edit(client, post_with_published_location):
+    category = post_with_published_location.category
+    client.get(f"/category/{category.slug}/")
+    category.is_published = False
+    category.save()
+    assert lookups.published_category(category.slug) is None
+    cache.clear()
+    assert client.get(f"/category/{category.slug}/").status_code == 404
+    assert post_with_published_location.title not in client.get(
+        "/"
+    ).content.decode("utf-8")
+
+
+def test_version_change_from_other_process_reloads(published_category):
+    tables = lookups.get_tables()
+    assert lookups.get_tables() is tables
+    cache.set(LOOKUPS_VERSION_KEY, "other-worker", None)
+    assert lookups.get_tables() is not tables
+
+
+def test_unknown_reference_loads_lazily(post_with_published_location, mixer):
+    post = post_with_published_location
+    tables = lookups.get_tables()
+    location = mixer.blend("blog.Location", is_published=True)
+    Post.objects.filter(id=post.id).update(location=location)
+    # Снимок ещё не знает о новой записи, как в другом процессе до сброса.
+    cache.set(LOOKUPS_VERSION_KEY, tables.version, None)
+    assert location.id not in lookups.get_tables().locations
+    loaded = lookups.with_lookups(Post.objects.all()).get(id=post.id)
+    assert loaded.location == location
+
+
+def test_other_worker_bump_reloads_lookups(
+        published_category, settings, tmp_path):
+    settings.CACHES = {"default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": str(tmp_path),
+    }}
+    tables = lookups.get_tables()
+    # Отдельный экземпляр общего бэкенда — как в другом процессе сервера.
+    other_worker = caches.create_connection("default")
+    Category.objects.filter(id=published_category.id).update(
+        is_published=False
+    )
+    other_worker.set(LOOKUPS_VERSION_KEY, "from-other-worker", None)
+    assert lookups.get_tables() is not tables
+    assert published_category.id not in lookups.published_category_ids()
+
+
+def test_lookups_expire_after_max_age(published_category, settings):
+    settings.LOOKUPS_MAX_AGE = 0
+    Category.objects.filter(id=published_category.id).update(
+        is_published=False
+    )
+    assert published_category.id not in lookups.published_category_ids()
+
+
+def test_process_local_cache_warns(settings):
+    assert [error.id for error in shared_cache_check(None)] == ["blog.W001"]
+    settings.CACHES = {"default": {
+        "BACKEND": "django.core.cache.backends.memcached.PyMemcacheCache",
+        "LOCATION": "127.0.0.1:11211",
+    }}
+    assert shared_cache_check(None) == []
@@ -0,0 +1,114 @@
+import json
+import re
+import threading
+
+import pytest
+from django.test import override_settings
+
+from blog import metrics
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry():
+    metrics.registry.reset()
+    yield
+    metrics.registry.reset()
+
+
+@pytest.fixture(autouse=True)
+def allowed_scraper():
+    with override_settings(METRICS_ALLOWED_IPS=["127.0.0.1"]):
+        yield
+
+
+def scrape(client, **extra):
+    response = client.get("/metrics", **extra)
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+    return response.content.decode("utf-8")
+
+
+def sample(text, name, **labels):
+    label_re = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    pattern = re.escape(name) + (
+        r"\{" + re.escape(label_re) + r"\}" if labels else ""
+    )
+    match = re.search(rf"^{pattern} (\S+)$", text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+
+def test_requests_counted_per_view(client, post_with_published_location):
+    client.get("/")
+    client.get("/")
+    text = scrape(client)
+    assert sample(
+        text, "blog_http_requests_total",
+        view="blog:index", method="GET", status="200",
+    ) == 2
+    assert sample(
+        text, "blog_http_request_duration_seconds_count", view="blog:index"
+    ) == 2
+    assert sample(
+        text, "blog_http_request_duration_seconds_bucket",
+        view="blog:index", le="+Inf",
+    ) == 2
+    assert sample(text, "blog_db_queries_total", view="blog:index") > 0
+    assert sample(text, "blog_cache_requests_total", cache="page",
+                  result="miss") == 1
+    assert sample(text, "blog_cache_requests_total", cache="page",
+                  result="hit") == 1
+
+
+def test_created_objects_counted(mixer, user, post_with_published_location):
+    mixer.blend("blog.Comment", post=post_with_published_location, author=user)
+    text = metrics.render(metrics.collect())
+    assert sample(text, "blog_posts_created_total") == 1
+    assert sample(text, "blog_comments_created_total") == 1
+
+
+def test_metrics_hidden_from_other_addresses(client):
+    response = client.get("/metrics", REMOTE_ADDR="10.1.2.3")
+    assert response.status_code == 404
+    with override_settings(METRICS_ALLOWED_IPS=[]):
+        assert client.get("/metrics").status_code == 404
+
+
+def test_counter_is_thread_safe():
+    def work():
+        for _ in range(1000):
+            metrics.posts_created.inc()
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    text = metrics.render(metrics.collect())
+    assert sample(text, "blog_posts_created_total") == 8000
+
+
+def test_file_store_aggregates_processes(tmp_path, client):
+    other_process = {
+        "blog_http_requests_total": [
+            [["blog:index", "GET", "200"], [5.0]]
+        ],
+    }
+    (tmp_path / "999999.json").write_text(json.dumps(other_process))
+    with override_settings(METRICS_DIR=tmp_path):
+        client.get("/")
+        text = scrape(client)
+    assert sample(
+        text, "blog_http_requests_total",
+        view="blog:index", method="GET", status="200",
+    ) == 6
+
+
+def test_file_store_keeps_files_of_reused_pid(tmp_path):
+    metrics.FileStore(tmp_path, 0).flush({"dead": []})
+    metrics.FileStore(tmp_path, 0).flush({"alive": []})
+    snapshots = metrics.FileStore(tmp_path, 0).collect()
+    assert sorted(key for snapshot in snapshots for key in snapshot) == [
+        "alive", "dead"
+    ]
@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.cache import next_pub_date, page_timeout
+from blog.constants import PAGE_CACHE_TIMEOUT
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.mark.parametrize("url", ["/", "/posts/{post.id}/",
+                                 "/category/{post.category.slug}/"])
+def test_anonymous_pages_are_cached(
+        client, post_with_published_location, url):
+    url = url.format(post=post_with_published_location)
+    first = client.get(url)
+    with CaptureQueriesContext(connection) as ctx:
+        second = client.get(url)
+    assert second.status_code == 200
+    assert second.content == first.content
+    assert len(ctx.captured_queries) == 0, (
+        "Убедитесь, что страница для анонимного пользователя отдаётся из "
+        "кэша без запросов к БД."
+    )
+
+
+def test_logged_in_pages_are_not_cached(
+        user_client, post_with_published_location):
+    user_client.get("/")
+    with CaptureQueriesContext(connection) as ctx:
+        user_client.get("/")
+    assert ctx.captured_queries
+
+
+def test_page_cache_purged_on_post_change(
+        client, post_with_published_location):
+    post = post_with_published_location
+    client.get("/")
+    client.get(f"/posts/{post.id}/")
+    post.title = "Обновлённый заголовок"
+    post.save()
+    assert post.title in client.get("/").content.decode("utf-8")
+    assert post.title in client.get(
+        f"/posts/{post.id}/").content.decode("utf-8")
+
+
+def test_page_cache_purged_on_new_comment(
+        mixer, client, post_with_published_location):
+    post = post_with_published_location
+    client.get(f"/posts/{post.id}/")
+    comment = mixer.blend("blog.Comment", post=post, text="Новый коммент")
+    assert comment.text in client.get(
+        f"/posts/{post.id}/").content.decode("utf-8")
+
+
+def test_page_timeout_capped_by_deferred_post(
+        mixer, user, published_category):
+    assert page_timeout(next_pub_date()) == PAGE_CACHE_TIMEOUT
+    mixer.blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        pub_date=timezone.now() + timedelta(seconds=30),
+    )
+    assert 0 < page_timeout(next_pub_date()) <= 30
@@ -0,0 +1,102 @@
+import base64
+import json
+import re
+from datetime import timedelta
+
+import pytest
+from conftest import N_PER_PAGE
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+pytestmark = [pytest.mark.django_db]
+
+CURSOR_RE = re.compile(r'href="\?cursor=([\w-]+)"')
+
+
+@pytest.fixture
+def many_posts(mixer: Mixer, user, published_category):
+    now = timezone.now()
+    same_time = now - timedelta(hours=1)
+    # Часть постов с одинаковой датой проверяет разбор ничьих по id.
+    pub_dates = [
+        same_time if i % 3 == 0 else now - timedelta(days=i)
+        for i in range(N_PER_PAGE * 2 + 3)
+    ]
+    return mixer.cycle(len(pub_dates)).blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        is_published=True,
+        pub_date=(date for date in pub_dates),
+    )
+
+
+def get_page_ids(user_client, url):
+    response = user_client.get(url)
+    assert response.status_code == 200
+    page_obj = response.context["page_obj"]
+    content = response.content.decode("utf-8")
+    return [post.id for post in page_obj], CURSOR_RE.findall(content)
+
+
+def test_cursor_pagination_walks_feed(user_client, many_posts):
+    expected = [
+        post.id for post in sorted(
+            many_posts, key=lambda p: (p.pub_date, p.id), reverse=True
+        )
+    ]
+    seen = []
+    cursor = ""
+    while cursor is not None:
+        ids, links = get_page_ids(user_client, f"/?cursor={cursor}")
+        assert len(ids) <= N_PER_PAGE
+        seen.extend(ids)
+        cursor = links[-1] if len(seen) < len(expected) else None
+        assert cursor is None or links, (
+            "Убедитесь, что курсорная страница содержит ссылку на следующую."
+        )
+    assert seen == expected
+
+
+def test_cursor_pagination_previous_link(user_client, many_posts):
+    first_ids, _ = get_page_ids(user_client, "/?cursor=")
+    response = user_client.get("/?cursor=")
+    next_cursor = response.context["page_obj"].next_cursor
+    response = user_client.get(f"/?cursor={next_cursor}")
+    previous_cursor = response.context["page_obj"].previous_cursor
+    assert previous_cursor
+    ids, _ = get_page_ids(user_client, f"/?cursor={previous_cursor}")
+    assert ids == first_ids
+
+
+def test_cursor_pagination_skips_count(user_client, many_posts):
+    with CaptureQueriesContext(connection) as ctx:
+        user_client.get("/?cursor=")
+    assert not any(
+        "COUNT(*)" in q["sql"].upper() for q in ctx.captured_queries
+    )
+
+
+def test_invalid_cursor_returns_first_page(user_client, many_posts):
+    first_ids, _ = get_page_ids(user_client, "/?cursor=")
+    ids, _ = get_page_ids(user_client, "/?cursor=not-a-cursor")
+    assert ids == first_ids
+
+
+@pytest.mark.parametrize("values", [
+    [{"dt": "2020-01-01T00:00:00+00:00"}, "abc"],
+    [1, 2],
+    ["notadate", 5],
+    [{"dt": [1]}, 5],
+    [None, 5],
+])
+def test_tampered_cursor_returns_first_page(
+        user_client, many_posts, published_category, values):
+    raw = json.dumps(["next", values]).encode()
+    cursor = base64.urlsafe_b64encode(raw).decode().rstrip("=")
+    for url in ("/", f"/category/{published_category.slug}/"):
+        first_ids, _ = get_page_ids(user_client, f"{url}?cursor=")
+        ids, _ = get_page_ids(user_client, f"{url}?cursor={cursor}")
+        assert ids == first_ids
@@ -0,0 +1,69 @@
+import json
+
+import pytest
+from django.test import Client, override_settings
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    path = tmp_path / "profiling.jsonl"
+    with override_settings(PROFILING_LOG_FILE=path):
+        yield path
+
+
+@pytest.fixture
+def staff_client(mixer):
+    client = Client()
+    client.force_login(mixer.blend("auth.User", is_staff=True))
+    return client
+
+
+def read_log(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_not_profiled_by_default(
+        client, log_file, post_with_published_location):
+    response = client.get("/")
+    assert "Server-Timing" not in response
+    assert not log_file.exists()
+
+
+def test_header_ignored_for_regular_users(
+        user_client, log_file, post_with_published_location):
+    response = user_client.get("/", HTTP_X_PROFILE="1")
+    assert "Server-Timing" not in response
+
+
+def test_staff_header_profiles_request(
+        staff_client, log_file, post_with_published_location):
+    response = staff_client.get("/", HTTP_X_PROFILE="1")
+    timing = response["Server-Timing"]
+    assert timing.startswith("total;dur=")
+    assert "sql;dur=" in timing
+    assert "tpl.includes_post_card.html" in timing
+    (entry,) = read_log(log_file)
+    assert entry["path"] == "/"
+    assert entry["status"] == 200
+    assert entry["sql"]["count"] >= len(entry["sql"]["slowest"]) > 0
+    assert entry["sql"]["slowest"][0]["sql"]
+    assert "includes/post_card.html" in entry["templates"]
+    assert "blog/index.html" in entry["templates"]
+    assert entry["cprofile"] is None
+
+
+def test_cprofile_mode(staff_client, log_file, post_with_published_location):
+    staff_client.get("/", HTTP_X_PROFILE="cprofile")
+    (entry,) = read_log(log_file)
+    assert any("cumulative" in line or "cumtime" in line
+               for line in entry["cprofile"])
+
+
+@override_settings(PROFILING_SAMPLE_RATE=1)
+def test_sampled_requests_are_profiled(
+        client, log_file, post_with_published_location):
+    response = client.get(f"/posts/{post_with_published_location.id}/")
+    assert "tpl.includes_comments.html" in response["Server-Timing"]
+    assert len(read_log(log_file)) == 1
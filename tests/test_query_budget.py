@@ -0,0 +1,155 @@
+from datetime import timedelta
+from typing import Dict, List, Tuple
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, reverse
+from django.utils import timezone
+
+from blog import lookups
+from blog import urls as blog_urls
+from blog.constants import LIMIT_FOR_PAGES
+from blog.feeds import rebuild_feeds
+from blog.models import Comment, Post
+from pages import urls as pages_urls
+
+pytestmark = [pytest.mark.django_db]
+
+SMALL, LARGE = 10, 1000
+
+# Максимальное число SQL-запросов на GET-страницу для автора постов.
+QUERY_BUDGETS: Dict[str, int] = {
+    "blog:index": 5,
+    "blog:search": 2,
+    "blog:export": 2,
+    "blog:post_detail": 5,
+    "blog:category_posts": 6,
+    "blog:profile": 6,
+    "blog:create_post": 4,
+    "blog:edit_post": 5,
+    "blog:delete_post": 4,
+    "blog:post_comments": 4,
+    "blog:add_comment": 3,
+    "blog:edit_comment": 3,
+    "blog:delete_comment": 3,
+    "blog:edit_profile": 3,
+    "pages:about": 2,
+    "pages:rules": 2,
+}
+# Ленты, страница которых при росте данных должна быть заполнена.
+FEED_ROUTES = ("blog:index", "blog:category_posts", "blog:profile")
+
+
+def collect_routes(patterns, namespace) -> List[Tuple[str, List[str]]]:
+    routes = []
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            routes += collect_routes(pattern.url_patterns, namespace)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            routes.append((
+                f"{namespace}:{pattern.name}",
+                list(pattern.pattern.regex.groupindex),
+            ))
+    return routes
+
+
+ROUTES = (
+    collect_routes(blog_urls.urlpatterns, blog_urls.app_name)
+    + collect_routes(pages_urls.urlpatterns, pages_urls.app_name)
+)
+
+
+class Seeder:
+    def __init__(self, mixer, user):
+        self.user = user
+        self.category = mixer.blend("blog.Category", is_published=True)
+        self.location = mixer.blend("blog.Location", is_published=True)
+        self.post = mixer.blend(
+            "blog.Post", author=user, category=self.category,
+            location=self.location, is_published=True,
+            pub_date=timezone.now() - timedelta(hours=1),
+        )
+        self.comment = mixer.blend(
+            "blog.Comment", post=self.post, author=user
+        )
+        self.total = 1
+
+    def grow_to(self, total: int):
+        now = timezone.now()
+        posts = Post.objects.bulk_create(
+            Post(
+                title=f"Пост {number}",
+                text="Текст",
+                pub_date=now,
+                author=self.user,
+                category=self.category,
+                location=self.location,
+                # bulk_create не вызывает pre_save, который ставит is_live.
+                is_live=True,
+            )
+            for number in range(self.total, total)
+        )
+        # И не вызывает post_save, который пишет строки лент.
+        rebuild_feeds()
+        Comment.objects.bulk_create(
+            Comment(text="Комментарий", post=self.post, author=self.user)
+            for _ in posts
+        )
+        self.total = total
+
+    def kwargs_for(self, params: List[str]) -> dict:
+        values = {
+            "post_id": self.post.id,
+            "comment_id": self.comment.id,
+            "username": self.user.username,
+            "category_slug": self.category.slug,
+        }
+        return {param: values[param] for param in params}
+
+
+def count_queries(client, url) -> Tuple[List[str], HttpResponse]:
+    cache.clear()
+    # Таблицы категорий и мест читаются раз на версию, а не на запрос.
+    lookups.get_tables()
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    assert response.status_code < 500, f"{url}: {response.status_code}"
+    return [
+        query["sql"] for query in ctx.captured_queries
+        if "SAVEPOINT" not in query["sql"]
+    ], response
+
+
+def test_every_route_has_budget():
+    missing = {name for name, _ in ROUTES} - set(QUERY_BUDGETS)
+    assert not missing, f"Задайте бюджет запросов для маршрутов: {missing}"
+
+
+@pytest.mark.parametrize(
+    ("name", "params"), ROUTES, ids=[name for name, _ in ROUTES]
+)
+def test_route_query_budget(mixer, user, user_client, name, params):
+    seeder = Seeder(mixer, user)
+    seeder.grow_to(SMALL)
+    url = reverse(name, kwargs=seeder.kwargs_for(params))
+    small, _ = count_queries(user_client, url)
+    seeder.grow_to(LARGE)
+    large, response = count_queries(user_client, url)
+    if name in FEED_ROUTES:
+        assert len(response.context["page_obj"]) == LIMIT_FOR_PAGES, (
+            f"{url}: лента при {LARGE} постах не заполняет страницу"
+        )
+
+    assert len(small) == len(large), (
+        f"{url}: число запросов зависит от объёма данных"
+        f" ({len(small)} при {SMALL} постах, {len(large)} при {LARGE}):\n"
+        + "\n".join(large)
+    )
+    budget = QUERY_BUDGETS[name]
+    assert len(large) <= budget, (
+        f"{url}: {len(large)} запросов при бюджете {budget}:\n"
+        + "\n".join(large)
+    )
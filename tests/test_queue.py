@@ -0,0 +1,120 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+
+from blog.models import Job
+from blog.queue import claim, enqueue, registry, run_job, task
+
+pytestmark = [pytest.mark.django_db]
+
+calls = []
+
+
+@task
+def remember(value):
+    calls.append(value)
+
+
+@task
+def explode():
+    raise ValueError("Задача упала")
+
+
+@pytest.fixture(autouse=True)
+def queued_mode():
+    calls.clear()
+    with override_settings(BLOG_TASKS_EAGER=False):
+        yield
+
+
+def test_delay_only_enqueues():
+    job = remember.delay(value=1)
+    assert job.name in registry
+    assert job.status == Job.QUEUED
+    assert job.payload == {"value": 1}
+    assert calls == []
+
+
+def test_eager_mode_runs_immediately():
+    with override_settings(BLOG_TASKS_EAGER=True):
+        job = remember.delay(value=2)
+    assert calls == [2]
+    job.refresh_from_db()
+    assert job.status == Job.DONE
+
+
+def test_job_is_claimed_once():
+    remember.delay(value=3)
+    timeout = timedelta(minutes=5)
+    first = claim(10, timeout)
+    assert len(first) == 1
+    assert first[0].status == Job.RUNNING
+    assert first[0].attempts == 1
+    assert claim(10, timeout) == []
+
+
+def test_expired_lease_is_reclaimed():
+    job = remember.delay(value=4)
+    claim(10, timedelta(minutes=5))
+    Job.objects.filter(id=job.id).update(
+        locked_until=timezone.now() - timedelta(seconds=1)
+    )
+    reclaimed = claim(10, timedelta(minutes=5))
+    assert [job.id for job in reclaimed] == [job.id]
+    assert reclaimed[0].attempts == 2
+
+
+def test_expired_lease_on_last_attempt_fails():
+    job = remember.delay(value=5)
+    Job.objects.filter(id=job.id).update(
+        status=Job.RUNNING, attempts=job.max_attempts,
+        locked_until=timezone.now() - timedelta(seconds=1),
+    )
+    assert claim(10, timedelta(minutes=5)) == []
+    job.refresh_from_db()
+    assert job.status == Job.FAILED
+    assert job.attempts == job.max_attempts
+    assert job.locked_until is None
+    assert calls == []
+
+
+@override_settings(BLOG_TASKS_RETRY_DELAY=0)
+def test_failed_job_is_retried_then_marked_failed():
+    job = explode.delay()
+    for attempt in range(1, job.max_attempts + 1):
+        (claimed,) = claim(1, timedelta(minutes=5))
+        assert not run_job(claimed)
+        claimed.refresh_from_db()
+        assert claimed.attempts == attempt
+        assert "Задача упала" in claimed.last_error
+    assert claimed.status == Job.FAILED
+    assert claim(1, timedelta(minutes=5)) == []
+
+
+def test_retry_is_delayed():
+    explode.delay()
+    (claimed,) = claim(1, timedelta(minutes=5))
+    run_job(claimed)
+    claimed.refresh_from_db()
+    assert claimed.status == Job.QUEUED
+    assert claimed.run_after > timezone.now()
+
+
+def test_unknown_task_fails():
+    job = enqueue("blog.tasks.missing")
+    (claimed,) = claim(1, timedelta(minutes=5))
+    assert not run_job(claimed)
+    job.refresh_from_db()
+    assert "blog.tasks.missing" in job.last_error
+
+
+@pytest.mark.django_db(transaction=True)
+def test_runworker_once_processes_queue():
+    for value in range(5):
+        remember.delay(value=value)
+    call_command("runworker", "--once", "--concurrency", "2")
+    assert sorted(calls) == list(range(5))
+    assert not Job.objects.exclude(status=Job.DONE).exists()
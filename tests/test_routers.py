@@ -0,0 +1,90 @@
+import pytest
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+from blog.cache import bump_post
+from blog.middleware import ReplicaRoutingMiddleware
+from blog.models import Post
+from blog.routers import ReplicaRouter, read_replica, use_replica
+
+STICKY_COOKIE = "use_primary_db"
+
+
+def run_view(method, view, cookies=None):
+    """Вернуть ответ и БД, выбранную роутером для чтения внутри view."""
+    chosen = {}
+
+    def get_response(request):
+        middleware.process_view(request, view, (), {})
+        chosen["db"] = ReplicaRouter().db_for_read(Post) or "default"
+        return HttpResponse()
+
+    middleware = ReplicaRoutingMiddleware(get_response)
+    request = getattr(RequestFactory(), method)("/")
+    request.COOKIES.update(cookies or {})
+    response = middleware(request)
+    return response, chosen["db"]
+
+
+@read_replica
+def read_view(request):
+    return HttpResponse()
+
+
+def write_view(request):
+    return HttpResponse()
+
+
+@pytest.fixture(autouse=True)
+def replicas():
+    with override_settings(READ_REPLICAS=["replica1"]):
+        yield
+
+
+def test_read_view_uses_replica():
+    _, db = run_view("get", read_view)
+    assert db == "replica1"
+    assert use_replica.get() is False
+
+
+def test_unmarked_view_uses_primary():
+    _, db = run_view("get", write_view)
+    assert db == "default"
+
+
+def test_post_sets_sticky_cookie():
+    response, db = run_view("post", read_view)
+    assert db == "default"
+    assert STICKY_COOKIE in response.cookies
+
+
+def test_sticky_cookie_reads_from_primary():
+    _, db = run_view("get", read_view, cookies={STICKY_COOKIE: "1"})
+    assert db == "default"
+
+
+def test_version_bump_reads_from_primary():
+    bump_post(1)
+    _, db = run_view("get", read_view)
+    assert db == "default"
+    with override_settings(REPLICA_STICKY_SECONDS=0):
+        bump_post(1)
+    _, db = run_view("get", read_view)
+    assert db == "replica1"
+
+
+def test_without_replicas_reads_default():
+    with override_settings(READ_REPLICAS=[]):
+        _, db = run_view("get", read_view)
+    assert db == "default"
+
+
+def test_writes_and_migrations_stay_on_primary():
+    router = ReplicaRouter()
+    token = use_replica.set(True)
+    try:
+        assert router.db_for_write(Post) == "default"
+    finally:
+        use_replica.reset(token)
+    assert router.allow_migrate("default", "blog")
+    assert not router.allow_migrate("replica1", "blog")
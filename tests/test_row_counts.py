@@ -0,0 +1,100 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.counters import (SQLITE_COUNTER_TRIGGERS, rebuild_row_counts,
+                           repair_row_counters)
+from blog.feeds import feed_count_key
+from blog.models import Comment, FeedEntry, Post, RowCount
+from blog.paginators import EstimatedCountPaginator
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def feed_posts(mixer, user, published_category):
+    return mixer.cycle(3).blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, image=None,
+        pub_date=timezone.now() - timedelta(hours=1),
+    )
+
+
+def counts():
+    return dict(RowCount.objects.exclude(count=0).values_list("key", "count"))
+
+
+def test_triggers_count_rows(mixer, user, published_category, feed_posts):
+    mixer.blend("blog.Comment", post=feed_posts[0], author=user)
+    assert counts() == {
+        "blog_post": 3,
+        "blog_comment": 1,
+        feed_count_key(FeedEntry.CATEGORY): 3,
+        feed_count_key(FeedEntry.AUTHOR): 3,
+        feed_count_key(FeedEntry.CATEGORY, published_category.id): 3,
+        feed_count_key(FeedEntry.AUTHOR, user.id): 3,
+    }
+    feed_posts[0].delete()
+    assert counts()["blog_post"] == 2
+    assert "blog_comment" not in counts()
+    assert counts()[feed_count_key(FeedEntry.AUTHOR, user.id)] == 2
+
+
+def test_rebuild_matches_triggers(feed_posts):
+    before = counts()
+    RowCount.objects.all().delete()
+    rebuild_row_counts()
+    assert counts() == before
+
+
+def test_repair_restores_dropped_triggers(feed_posts):
+    with connection.cursor() as cursor:
+        for name in SQLITE_COUNTER_TRIGGERS:
+            cursor.execute(f"DROP TRIGGER {name}")
+    Post.objects.filter(id=feed_posts[0].id).delete()
+    repair_row_counters()
+    assert counts()["blog_post"] == 2
+    Post.objects.filter(id=feed_posts[1].id).delete()
+    assert counts()["blog_post"] == 1
+
+
+def test_exact_count_below_threshold(feed_posts):
+    RowCount.objects.filter(key="blog_post").update(count=7)
+    paginator = EstimatedCountPaginator(Post.objects.all(), 2)
+    with CaptureQueriesContext(connection) as ctx:
+        assert paginator.count == 3
+    assert len(ctx.captured_queries) == 1
+    assert not paginator.estimated
+
+
+def test_counter_above_threshold(feed_posts):
+    RowCount.objects.filter(key="blog_post").update(count=50000)
+    paginator = EstimatedCountPaginator(Post.objects.all(), 10)
+    assert paginator.count == 50000
+    assert paginator.estimated
+    assert paginator.num_pages == 5000
+    filtered = EstimatedCountPaginator(Comment.objects.filter(id__gt=0), 10)
+    assert filtered.count == 0
+    assert not filtered.estimated
+
+
+def test_index_shows_approximate_pages(client, feed_posts):
+    RowCount.objects.filter(
+        key=feed_count_key(FeedEntry.CATEGORY)
+    ).update(count=123456)
+    response = client.get("/?page=2")
+    page_obj = response.context["page_obj"]
+    assert page_obj.paginator.estimated
+    content = response.content.decode("utf-8")
+    assert "Примерно 12346 стр." in content
+    assert "Последняя" not in content
+    assert "…" in content
+
+
+def test_small_feed_keeps_exact_pages(client, feed_posts):
+    response = client.get("/")
+    assert not response.context["page_obj"].paginator.estimated
+    assert "Примерно" not in response.content.decode("utf-8")
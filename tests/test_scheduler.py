@@ -0,0 +1,105 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog.cache import FEED_VERSION_KEY, get_version
+from blog.management.commands.publish_scheduled import Command
+from blog import scheduler
+from blog.models import Post
+from blog.scheduler import post_went_live, publish_due_posts
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def scheduled_post(mixer, user, published_category):
+    return mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, image=None,
+        pub_date=timezone.now() + timedelta(hours=1),
+    )
+
+
+def arrive(post):
+    """Дата публикации наступила, но планировщик ещё не запускался."""
+    Post.objects.filter(id=post.id).update(
+        pub_date=timezone.now() - timedelta(seconds=1)
+    )
+
+
+def test_save_sets_is_live(scheduled_post):
+    assert not scheduled_post.is_live
+    scheduled_post.pub_date = timezone.now() - timedelta(minutes=1)
+    scheduled_post.save()
+    assert Post.objects.get(id=scheduled_post.id).is_live
+    scheduled_post.pub_date = timezone.now() + timedelta(days=1)
+    scheduled_post.save()
+    assert not Post.objects.get(id=scheduled_post.id).is_live
+
+
+def test_feed_shows_post_after_scheduler(
+        client, scheduled_post, django_capture_on_commit_callbacks):
+    arrive(scheduled_post)
+    assert scheduled_post.title not in client.get("/").content.decode()
+    version = get_version(FEED_VERSION_KEY)
+    with django_capture_on_commit_callbacks(execute=True):
+        assert publish_due_posts() == [scheduled_post.id]
+    assert get_version(FEED_VERSION_KEY) != version
+    assert scheduled_post.title in client.get("/").content.decode()
+    assert client.get(f"/posts/{scheduled_post.id}/").status_code == 200
+    assert publish_due_posts() == []
+
+
+def test_rescheduled_post_is_not_reported(
+        monkeypatch, mixer, scheduled_post,
+        django_capture_on_commit_callbacks):
+    other_post = mixer.blend(
+        "blog.Post", author=scheduled_post.author,
+        category=scheduled_post.category, is_published=True, image=None,
+        pub_date=timezone.now() + timedelta(hours=1),
+    )
+    arrive(scheduled_post)
+    arrive(other_post)
+    select_due_posts = scheduler.due_posts
+    calls = []
+
+    def due_posts(now):
+        calls.append(now)
+        if len(calls) == 2:
+            # Автор перенёс пост между выборкой и обновлением.
+            Post.objects.filter(id=scheduled_post.id).update(
+                pub_date=now + timedelta(days=1)
+            )
+        return select_due_posts(now)
+
+    def went_live(sender, post_ids, **kwargs):
+        signalled.extend(post_ids)
+
+    signalled = []
+    monkeypatch.setattr(scheduler, "due_posts", due_posts)
+    post_went_live.connect(went_live)
+    try:
+        with django_capture_on_commit_callbacks(execute=True):
+            assert publish_due_posts() == [other_post.id]
+    finally:
+        post_went_live.disconnect(went_live)
+    assert signalled == [other_post.id]
+    assert not Post.objects.get(id=scheduled_post.id).is_live
+
+
+def test_command_publishes_due_posts(scheduled_post):
+    arrive(scheduled_post)
+    out = StringIO()
+    call_command("publish_scheduled", stdout=out)
+    assert "Вышло публикаций: 1" in out.getvalue()
+    assert Post.objects.get(id=scheduled_post.id).is_live
+
+
+def test_loop_sleeps_until_next_publication(scheduled_post):
+    assert 3500 < Command.pause(max_interval=7200) <= 3600
+    assert Command.pause(max_interval=60) == 60
+    Post.objects.filter(id=scheduled_post.id).update(is_live=True)
+    assert Command.pause(max_interval=60) == 60
@@ -0,0 +1,102 @@
+import re
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.utils import timezone
+
+from blog.constants import LIMIT_FOR_PAGES
+from blog.search import SQLITE_TRIGGERS
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def blend_post(mixer, user, published_category):
+    def blend(**kwargs):
+        params = dict(author=user, category=published_category,
+                      is_published=True, pub_date=timezone.now())
+        params.update(kwargs)
+        return mixer.blend("blog.Post", **params)
+    return blend
+
+
+def found_ids(client, query, cursor=None):
+    params = {"q": query}
+    if cursor is not None:
+        params["cursor"] = cursor
+    response = client.get("/search/", params)
+    assert response.status_code == 200
+    page_obj = response.context["page_obj"]
+    return [post.id for post in page_obj], page_obj
+
+
+def test_search_page_without_query(client):
+    response = client.get("/search/")
+    assert response.status_code == 200
+    assert response.context["page_obj"] is None
+
+
+def test_search_ranks_title_above_text(client, blend_post):
+    in_text = blend_post(title="Про погоду", text="Заметки о рыбалке")
+    in_title = blend_post(title="Рыбалка на озере", text="Про погоду")
+    blend_post(title="Другое", text="Ничего общего")
+    ids, _ = found_ids(client, "рыбалк")
+    assert ids == [in_title.id, in_text.id]
+
+
+def test_search_index_follows_edits_and_deletes(client, blend_post):
+    post = blend_post(title="Первый вариант", text="Текст")
+    post.title = "Исправленный заголовок"
+    post.save()
+    assert found_ids(client, "первый")[0] == []
+    assert found_ids(client, "исправленный")[0] == [post.id]
+    post.delete()
+    assert found_ids(client, "исправленный")[0] == []
+
+
+def test_search_respects_visibility(
+        client, user_client, blend_post, user):
+    hidden = [
+        blend_post(title="Скрытый пост", is_published=False),
+        blend_post(
+            title="Скрытый пост",
+            pub_date=timezone.now() + timedelta(days=1),
+        ),
+    ]
+    assert found_ids(client, "скрытый")[0] == []
+    assert sorted(found_ids(user_client, "скрытый")[0]) == sorted(
+        post.id for post in hidden
+    )
+
+
+def test_search_is_cursor_paginated(client, blend_post):
+    posts = [
+        blend_post(title=f"Серия {number}", text="серия")
+        for number in range(LIMIT_FOR_PAGES + 3)
+    ]
+    first, page_obj = found_ids(client, "серия")
+    assert len(first) == LIMIT_FOR_PAGES
+    content = client.get("/search/", {"q": "серия"}).content.decode()
+    assert re.search(r"\?q=%D1%81%D0%B5%D1%80%D0%B8%D1%8F&amp;cursor=",
+                     content)
+    second, _ = found_ids(client, "серия", page_obj.next_cursor)
+    assert sorted(first + second) == sorted(post.id for post in posts)
+
+
+def test_search_ignores_fts_syntax(client, blend_post):
+    post = blend_post(title="Кавычки и звёздочки")
+    assert found_ids(client, 'кавычки" * ( ^ :')[0] == [post.id]
+
+
+@pytest.mark.skipif(
+    connection.vendor != "sqlite", reason="FTS5 triggers are SQLite-only"
+)
+def test_search_triggers_survive_migrations():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+            " AND tbl_name = 'blog_post'"
+        )
+        triggers = {row[0] for row in cursor.fetchall()}
+    assert set(SQLITE_TRIGGERS) <= triggers
@@ -0,0 +1,92 @@
+from datetime import timedelta
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.files.images import ImageFile
+from django.core.management import call_command
+from PIL import Image
+
+from blog.constants import THUMBNAIL_WIDTHS
+from blog.images import THUMBNAIL_FORMATS, thumbnail_name
+from blog.models import Post
+from blog.queue import claim, run_job
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def post_with_large_image(mixer, user, published_category):
+    buffer = BytesIO()
+    Image.new("RGB", (2000, 1000), color=(10, 200, 30)).save(buffer, "JPEG")
+    return mixer.blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        image=ImageFile(buffer, name="large_image.jpg"),
+    )
+
+
+def test_thumbnails_created_on_upload(post_with_large_image):
+    image = post_with_large_image.image
+    for width in THUMBNAIL_WIDTHS:
+        for extension, image_format in THUMBNAIL_FORMATS.items():
+            name = thumbnail_name(image.name, width, extension)
+            assert image.storage.exists(name), name
+            with image.storage.open(name) as thumbnail:
+                opened = Image.open(thumbnail)
+                assert opened.format == image_format
+                assert opened.size == (width, width // 2)
+
+
+def test_feed_card_has_srcset(client, post_with_large_image):
+    content = client.get("/").content.decode("utf-8")
+    name = post_with_large_image.image.name
+    assert thumbnail_name(name, THUMBNAIL_WIDTHS[0], "webp") in content
+    assert 'type="image/webp"' in content
+    assert f"{THUMBNAIL_WIDTHS[-1]}w" in content
+
+
+def test_generate_thumbnails_command(post_with_large_image):
+    image = post_with_large_image.image
+    name = thumbnail_name(image.name, THUMBNAIL_WIDTHS[0], "jpg")
+    image.storage.delete(name)
+    out = StringIO()
+    call_command("generate_thumbnails", stdout=out)
+    assert image.storage.exists(name)
+    assert "от оригинала" in out.getvalue()
+
+
+def test_image_without_thumbnails_has_no_srcset(
+        client, post_with_large_image):
+    Post.objects.filter(id=post_with_large_image.id).update(
+        thumbnails_image=""
+    )
+    content = client.get("/").content.decode("utf-8")
+    assert post_with_large_image.image.url in content
+    assert "srcset" not in content
+
+
+def test_generate_thumbnails_marks_old_images(post_with_large_image):
+    Post.objects.filter(id=post_with_large_image.id).update(
+        thumbnails_image=""
+    )
+    call_command("generate_thumbnails", stdout=StringIO())
+    assert Post.objects.get(id=post_with_large_image.id).thumbnails_ready
+
+
+def test_srcset_waits_for_worker(
+        client, mixer, user, published_category, settings):
+    settings.BLOG_TASKS_EAGER = False
+    buffer = BytesIO()
+    Image.new("RGB", (800, 400), color=(200, 10, 30)).save(buffer, "JPEG")
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, image=ImageFile(buffer, name="queued.jpg"),
+    )
+    assert "srcset" not in client.get("/").content.decode("utf-8")
+    for job in claim(10, timedelta(minutes=1)):
+        run_job(job)
+    content = client.get("/").content.decode("utf-8")
+    assert thumbnail_name(post.image.name, THUMBNAIL_WIDTHS[0], "webp") in (
+        content
+    )
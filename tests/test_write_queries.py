@@ -0,0 +1,117 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+POST_TEXT_COLUMN = '"blog_post"."text"'
+
+
+@pytest.fixture
+def comment(mixer, user, post_with_published_location):
+    return mixer.blend(
+        "blog.Comment", post=post_with_published_location, author=user
+    )
+
+
+@pytest.fixture
+def post_form_data(published_category):
+    return {
+        "title": "Заголовок",
+        "text": "Текст",
+        "pub_date": "2020-01-01 10:00",
+        "category": published_category.id,
+    }
+
+
+def assert_queries(client, method, url, data, budget, loads_post_text=True):
+    with CaptureQueriesContext(connection) as ctx:
+        response = getattr(client, method)(url, data)
+    assert response.status_code in (HTTPStatus.OK, HTTPStatus.FOUND)
+    queries = [query["sql"] for query in ctx.captured_queries]
+    assert len(queries) <= budget, (
+        f"{method.upper()} {url}: {len(queries)} запросов при бюджете"
+        f" {budget}:\n" + "\n".join(queries)
+    )
+    if not loads_post_text:
+        assert not any(POST_TEXT_COLUMN in sql for sql in queries), (
+            f"{method.upper()} {url} не должен загружать текст поста:\n"
+            + "\n".join(queries)
+        )
+
+
+def test_add_comment_queries(user_client, post_with_published_location):
+    assert_queries(
+        user_client, "post",
+        f"/posts/{post_with_published_location.id}/comment/",
+        {"text": "Комментарий"}, budget=7, loads_post_text=False,
+    )
+
+
+def test_add_comment_to_missing_post(user_client):
+    response = user_client.post("/posts/9999/comment/", {"text": "text"})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_create_post_queries(user_client, post_form_data):
+    assert_queries(
+        user_client, "post", "/posts/create/", post_form_data, budget=5
+    )
+
+
+def test_edit_post_queries(
+        user_client, post_with_published_location, post_form_data):
+    url = f"/posts/{post_with_published_location.id}/edit/"
+    assert_queries(user_client, "get", url, {}, budget=5)
+    # Форма снимает пост с публикации: +1 запрос на удаление строк лент.
+    assert_queries(user_client, "post", url, post_form_data, budget=7)
+
+
+def test_edit_post_by_another_user_queries(
+        another_user_client, post_with_published_location):
+    assert_queries(
+        another_user_client, "post",
+        f"/posts/{post_with_published_location.id}/edit/", {}, budget=3,
+    )
+
+
+def test_delete_post_queries(user_client, post_with_published_location):
+    url = f"/posts/{post_with_published_location.id}/delete/"
+    assert_queries(user_client, "get", url, {}, budget=4)
+    assert_queries(
+        user_client, "post", url, {}, budget=7, loads_post_text=False
+    )
+
+
+@pytest.mark.parametrize("comments", [10, 200])
+def test_delete_post_with_comments_queries(
+        mixer, user, user_client, post_with_published_location, comments):
+    mixer.cycle(comments).blend(
+        "blog.Comment", post=post_with_published_location, author=user
+    )
+    url = f"/posts/{post_with_published_location.id}/delete/"
+    assert_queries(
+        user_client, "post", url, {}, budget=7, loads_post_text=False
+    )
+    assert not post_with_published_location.comments.exists()
+
+
+def test_comment_write_queries(
+        user_client, post_with_published_location, comment):
+    post_id = post_with_published_location.id
+    edit_url = f"/posts/{post_id}/edit_comment/{comment.id}/"
+    delete_url = f"/posts/{post_id}/delete_comment/{comment.id}/"
+    assert_queries(user_client, "post", edit_url, {"text": "new"}, budget=4)
+    assert_queries(
+        user_client, "post", delete_url, {}, budget=7, loads_post_text=False
+    )
+
+
+def test_edit_profile_queries(user_client, user):
+    assert_queries(
+        user_client, "post", "/profile/edit/",
+        {"username": user.username, "email": "user@example.com"},
+        budget=5,
+    )